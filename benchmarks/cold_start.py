@@ -0,0 +1,66 @@
+"""Cold-start timing: importing omelette, then initializing a recipe with a .env file and loading its settings, each in
+a fresh interpreter like a Lambda cold start.
+
+Usage: python benchmarks/cold_start.py [--runs 10]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT = """
+import time
+t1 = time.perf_counter()
+import omelette
+print(time.perf_counter() - t1)
+"""
+
+INIT_RECIPE = """
+import sys, time
+t1 = time.perf_counter()
+from omelette.core.recipe import Recipe
+recipe = Recipe()
+recipe._input_args = []
+recipe.init_recipe(sys.argv[1])
+assert recipe.job_name == "bench", recipe.job_name
+print(time.perf_counter() - t1)
+"""
+
+
+def run(code: str, cwd: str, *args: str) -> float:
+    env = dict(os.environ, PYTHONPATH=REPO_DIR)
+    env.pop("JOB_NAME", None)
+    output = subprocess.run([sys.executable, "-c", code, *args], cwd=cwd, env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def report(name: str, timings):
+    print(f"{name:<40} median {statistics.median(timings) * 1000:8.1f} ms   "
+          f"min {min(timings) * 1000:8.1f} ms   max {max(timings) * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as recipe_dir:
+        os.makedirs(os.path.join(recipe_dir, "jobs", "bench"))
+
+        with open(os.path.join(recipe_dir, "jobs", "bench", "settings.toml"), "w") as f:
+            f.write('[default]\nname = "bench"\nurl = "${BENCH_URL}"\n\n[default.snowflake]\nuser = "user"\n')
+        with open(os.path.join(recipe_dir, ".env"), "w") as f:
+            f.write("JOB_NAME=bench\nBENCH_URL=https://example.com\n")
+
+        report("import omelette", [run(IMPORT, recipe_dir) for _ in range(args.runs)])
+        report("import + .env + init_recipe + settings", [run(INIT_RECIPE, recipe_dir, recipe_dir)
+                                                          for _ in range(args.runs)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Import time of omelette and of each egg, each measured in a fresh interpreter. Eggs are loaded lazily, so
+`import omelette.eggs` shouldn't pull in any connector; eggs whose dependencies aren't installed are skipped.
+
+Usage: python benchmarks/import_time.py [--runs 10]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STATEMENTS = [
+    "import omelette",
+    "import omelette.eggs",
+    "from omelette.eggs import S3",
+    "from omelette.eggs import Sftp",
+    "from omelette.eggs import SftpS3Interface",
+    "from omelette.eggs import Snowflake",
+    "from omelette.eggs import Slack",
+    "from omelette.eggs import Kafka",
+]
+
+TIMER = """
+import sys, time
+t1 = time.perf_counter()
+exec(sys.argv[1])
+print(time.perf_counter() - t1)
+print(sorted(name for name in ("boto3", "snowflake.connector", "pysftp", "slack", "kafka") if name in sys.modules))
+"""
+
+
+def time_import(statement: str):
+    """Seconds to run `statement` in a fresh interpreter, and which heavy dependencies it imported."""
+    result = subprocess.run([sys.executable, "-c", TIMER, statement], env=dict(os.environ, PYTHONPATH=REPO_DIR),
+                            capture_output=True, text=True)
+
+    if result.returncode != 0:
+        raise ImportError(result.stderr.strip().splitlines()[-1])
+
+    seconds, modules = result.stdout.strip().splitlines()[-2:]
+    return float(seconds), modules
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    for statement in STATEMENTS:
+        try:
+            results = [time_import(statement) for _ in range(args.runs)]
+        except ImportError as e:
+            print(f"{statement:<45} skipped: {e}")
+            continue
+
+        timings = [seconds for seconds, _ in results]
+        print(f"{statement:<45} median {statistics.median(timings) * 1000:8.1f} ms   "
+              f"min {min(timings) * 1000:8.1f} ms   loaded {results[0][1]}")
+
+
+if __name__ == "__main__":
+    main()
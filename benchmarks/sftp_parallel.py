@@ -0,0 +1,69 @@
+"""Sftp.get/put against get_parallel/put_parallel over a local SFTP server stand-in (see sftp_server.py) with
+injected network latency. With enough latency, a single channel is limited by its window and request pipeline, and
+parallel channels help. The stand-in is a Python server, so it caps throughput at a few tens of MB/s regardless.
+
+Usage: python benchmarks/sftp_parallel.py [--size 64] [--latency 0 0.02 0.05 0.1] [--workers 4] [--chunk-size 8]
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.sftp_server import HOST, start  # noqa: E402
+from omelette.eggs.sftp import MB, Sftp  # noqa: E402
+
+
+def timed(transfer) -> float:
+    t1 = time.perf_counter()
+    transfer()
+    return time.perf_counter() - t1
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=64, help="file size in MB")
+    parser.add_argument("--latency", type=float, nargs="+", default=[0.0, 0.02, 0.05, 0.1],
+                        help="one-way latencies in seconds")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--chunk-size", type=int, default=8, help="chunk size in MB")
+    args = parser.parse_args()
+
+    logging.getLogger("paramiko").setLevel(logging.CRITICAL)
+    # The stand-in's host key is passed explicitly
+    warnings.filterwarnings("ignore", message="Failed to load HostKeys")
+
+    with tempfile.TemporaryDirectory() as remote_dir, tempfile.TemporaryDirectory() as local_dir:
+        source = os.path.join(local_dir, "source.bin")
+        with open(source, "wb") as f:
+            f.write(os.urandom(args.size * MB))
+
+        print(f"{args.size} MB file, {args.workers} workers, {args.chunk_size} MB chunks")
+
+        for latency in args.latency:
+            port, host_fingerprint = start(latency)
+            sftp = Sftp(host=HOST, port=port, username="bench", password="bench", host_fingerprint=host_fingerprint)
+            remote = f"{remote_dir}/remote.bin"
+            local = os.path.join(local_dir, "copy.bin")
+            chunk_size = args.chunk_size * MB
+
+            transfers = {
+                "put": lambda: sftp.put(source, remote),
+                "put_parallel": lambda: sftp.put_parallel(source, remote, chunk_size, args.workers),
+                "get": lambda: sftp.get(remote, local),
+                "get_parallel": lambda: sftp.get_parallel(remote, local, chunk_size, args.workers),
+            }
+
+            for name, transfer in transfers.items():
+                seconds = timed(transfer)
+                print(f"{latency * 1000:5.0f} ms   {name:<14} {seconds:8.2f} s   {args.size / seconds:8.1f} MB/s")
+
+            sftp.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Two-phase transfers (download to a local file, then upload) against streaming transfers, in both directions between
+S3 and a local SFTP server stand-in (see sftp_server.py), optionally with simulated network latency on the SFTP link.
+
+S3 is a local moto server (moto[server]) unless --bucket is given, in which case that bucket is used with the default
+AWS credentials.
+
+Usage: python benchmarks/sftp_s3_transfer.py [--size 64] [--latency 0.02] [--runs 3] [--bucket my-bucket]
+"""
+import argparse
+import contextlib
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+
+import boto3
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.sftp_server import HOST, start  # noqa: E402
+from omelette.eggs.s3 import MB, S3  # noqa: E402
+from omelette.eggs.sftp import Sftp  # noqa: E402
+from omelette.eggs.sftp_s3_interface import SftpS3Interface  # noqa: E402
+
+KEY = "benchmarks/sftp_s3_transfer.bin"
+
+
+@contextlib.contextmanager
+def get_bucket(bucket: str):
+    if bucket:
+        yield bucket
+        return
+
+    # moto as a local HTTP server rather than mock_aws, which patches botocore in-process and slows paramiko down
+    from moto.server import ThreadedMotoServer
+
+    server = ThreadedMotoServer(port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    os.environ.update(AWS_ENDPOINT_URL_S3=f"http://{host}:{port}", AWS_DEFAULT_REGION="us-east-1",
+                      AWS_ACCESS_KEY_ID="benchmark", AWS_SECRET_ACCESS_KEY="benchmark")
+
+    try:
+        boto3.client("s3").create_bucket(Bucket="benchmark")
+        yield "benchmark"
+    finally:
+        server.stop()
+
+
+def timed(runs: int, transfer) -> float:
+    timings = []
+
+    for _ in range(runs):
+        t1 = time.perf_counter()
+        transfer()
+        timings.append(time.perf_counter() - t1)
+
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=64, help="file size in MB")
+    parser.add_argument("--latency", type=float, default=0.0, help="one-way SFTP latency in seconds")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--bucket", default=None)
+    args = parser.parse_args()
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    logging.getLogger("paramiko").setLevel(logging.CRITICAL)
+    # The stand-in's host key is passed explicitly
+    warnings.filterwarnings("ignore", message="Failed to load HostKeys")
+    port, host_fingerprint = start(args.latency)
+
+    with get_bucket(args.bucket) as bucket, tempfile.TemporaryDirectory() as sftp_dir, \
+            tempfile.TemporaryDirectory() as local_dir:
+        with open(os.path.join(sftp_dir, "source.bin"), "wb") as f:
+            f.write(os.urandom(args.size * MB))
+
+        sftp = Sftp(host=HOST, port=port, username="bench", password="bench", host_fingerprint=host_fingerprint)
+        interface = SftpS3Interface(sftp=sftp, s3=S3())
+        interface.s3_client.upload_file(os.path.join(sftp_dir, "source.bin"), bucket, KEY)
+
+        transfers = {
+            "SFTP -> S3 two-phase": lambda: interface.transfer_sftp_to_s3("source.bin", sftp_dir, f"{local_dir}/",
+                                                                          bucket, KEY),
+            "SFTP -> S3 streaming": lambda: interface.stream_sftp_to_s3("source.bin", sftp_dir, bucket, KEY),
+            "S3 -> SFTP two-phase": lambda: interface.transfer_s3_to_sftp(bucket, KEY, "copy.bin", sftp_dir,
+                                                                          local_dir),
+            "S3 -> SFTP streaming": lambda: interface.stream_s3_to_sftp(bucket, KEY, "copy.bin", sftp_dir),
+        }
+
+        print(f"{args.size} MB file, {args.latency * 1000:.0f} ms one-way SFTP latency, median of {args.runs} runs")
+
+        for name, transfer in transfers.items():
+            seconds = timed(args.runs, transfer)
+            print(f"{name:<24} {seconds:8.2f} s   {args.size / seconds:8.1f} MB/s")
+
+        sftp.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Local SFTP server stand-in for the benchmarks: a paramiko SFTP server over the local file system, accepting any
+password, optionally behind a TCP proxy that delays traffic in each direction to simulate network latency.
+
+Usage:
+
+    port, host_fingerprint = start(latency=0.02)
+    Sftp(host="127.0.0.1", port=port, username="bench", password="bench", host_fingerprint=host_fingerprint)
+
+`start` runs the server in a subprocess, so it doesn't compete with the client for the GIL; `serve` runs it in this
+process.
+"""
+import argparse
+import atexit
+import logging
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from typing import Tuple
+
+import paramiko
+
+HOST = "127.0.0.1"
+
+
+class Handle(paramiko.SFTPHandle):
+    def stat(self):
+        return paramiko.SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+
+    def chattr(self, attr):
+        if attr.st_size is not None:
+            self.writefile.truncate(attr.st_size)
+        return paramiko.SFTP_OK
+
+
+class FileSystem(paramiko.SFTPServerInterface):
+    def list_folder(self, path):
+        return [paramiko.SFTPAttributes.from_stat(os.stat(os.path.join(path, name)), name)
+                for name in os.listdir(path)]
+
+    def stat(self, path):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.stat(path))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    lstat = stat
+
+    def canonicalize(self, path):
+        return os.path.abspath(path)
+
+    def mkdir(self, path, attr):
+        os.mkdir(path)
+        return paramiko.SFTP_OK
+
+    def open(self, path, flags, attr):
+        try:
+            fd = os.open(path, flags, 0o644)
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+        if flags & os.O_APPEND:
+            mode = "ab"
+        elif flags & os.O_RDWR:
+            mode = "r+b"
+        else:
+            mode = "wb" if flags & os.O_WRONLY else "rb"
+
+        handle = Handle(flags)
+        handle.filename = path
+        handle.readfile = handle.writefile = os.fdopen(fd, mode)
+        return handle
+
+
+class Server(paramiko.ServerInterface):
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_channel_request(self, kind, chanid):
+        return paramiko.OPEN_SUCCEEDED
+
+
+def listen() -> socket.socket:
+    sock = socket.socket()
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((HOST, 0))
+    sock.listen(16)
+    return sock
+
+
+def accept_forever(sock: socket.socket, handle_connection):
+    def loop():
+        while True:
+            conn, _ = sock.accept()
+            threading.Thread(target=handle_connection, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=loop, daemon=True).start()
+
+
+def delay_pipe(source: socket.socket, target: socket.socket, latency: float):
+    """Forward `source` to `target`, delivering each chunk `latency` seconds after it arrived, in order. Chunks keep
+    flowing while earlier ones wait, like a link with that one-way delay."""
+    queue = deque()
+    ready = threading.Condition()
+
+    def send():
+        while True:
+            with ready:
+                while not queue:
+                    ready.wait()
+                due, data = queue.popleft()
+
+            time.sleep(max(0.0, due - time.monotonic()))
+
+            try:
+                if not data:
+                    target.shutdown(socket.SHUT_WR)
+                    return
+                target.sendall(data)
+            except OSError:
+                return
+
+    threading.Thread(target=send, daemon=True).start()
+
+    while True:
+        try:
+            data = source.recv(1024 * 1024)
+        except OSError:
+            data = b""
+
+        with ready:
+            queue.append((time.monotonic() + latency, data))
+            ready.notify()
+
+        if not data:
+            return
+
+
+def serve(latency: float = 0.0) -> Tuple[int, str]:
+    """Start the server on a free port, in daemon threads. With `latency`, clients connect through a proxy that
+    delays traffic by that many seconds in each direction. Returns the port to connect to and the host key (base64),
+    for `Sftp(host_fingerprint=...)`."""
+    host_key = paramiko.RSAKey.generate(2048)
+    server_sock = listen()
+
+    def handle_sftp(conn: socket.socket):
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        transport = paramiko.Transport(conn)
+        transport.add_server_key(host_key)
+        transport.set_subsystem_handler("sftp", paramiko.SFTPServer, FileSystem)
+        transport.start_server(server=Server())
+
+    accept_forever(server_sock, handle_sftp)
+
+    if not latency:
+        return server_sock.getsockname()[1], host_key.get_base64()
+
+    proxy_sock = listen()
+
+    def handle_proxy(client: socket.socket):
+        upstream = socket.create_connection(server_sock.getsockname())
+
+        for sock in (client, upstream):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        threading.Thread(target=delay_pipe, args=(client, upstream, latency), daemon=True).start()
+        delay_pipe(upstream, client, latency)
+
+    accept_forever(proxy_sock, handle_proxy)
+    return proxy_sock.getsockname()[1], host_key.get_base64()
+
+
+def start(latency: float = 0.0) -> Tuple[int, str]:
+    """Like `serve`, but in a subprocess that is stopped when this process exits."""
+    process = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--latency", str(latency)],
+                               stdout=subprocess.PIPE, text=True)
+    atexit.register(process.terminate)
+    port, host_fingerprint = process.stdout.readline().split()
+    return int(port), host_fingerprint
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    # Clients disconnecting at the end of a benchmark isn't worth a traceback
+    logging.getLogger("paramiko").setLevel(logging.CRITICAL)
+    print(*serve(args.latency), flush=True)
+
+    while True:
+        time.sleep(3600)
+
+
+if __name__ == "__main__":
+    main()
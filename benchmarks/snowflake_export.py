@@ -0,0 +1,101 @@
+"""Snowflake.write_results_to_file: the "rows" engine (DictCursor, one dict per row) against the "arrow" engine
+(Arrow result batches written in bulk).
+
+By default runs against a stand-in connection that serves a synthetic result set, to compare the cost of the writers
+on the client side. Set SNOWFLAKE_USER, SNOWFLAKE_PASSWORD, SNOWFLAKE_ACCOUNT, SNOWFLAKE_REGION, SNOWFLAKE_WAREHOUSE,
+SNOWFLAKE_DATABASE and SNOWFLAKE_ROLE and pass --query to run against a real account instead.
+
+Both engines write CSV, since the rows engine's JSON output can't serialize NUMBER and TIMESTAMP values.
+
+Usage: python benchmarks/snowflake_export.py [--rows 1000000] [--query "SELECT ..."]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pyarrow as pa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from omelette.eggs.snowflake import Snowflake  # noqa: E402
+
+BATCH_SIZE = 50_000
+
+
+def get_synthetic_table(rows: int) -> pa.Table:
+    start = datetime(2026, 1, 1)
+    return pa.table({
+        "ID": pa.array([i if i % 100 else None for i in range(rows)], pa.int64()),
+        "NAME": pa.array([f"customer {i}" for i in range(rows)]),
+        "AMOUNT": pa.array([Decimal(i % 10_000) / 100 for i in range(rows)], pa.decimal128(12, 2)),
+        "CREATED": pa.array([start + timedelta(seconds=i) for i in range(rows)], pa.timestamp("us")),
+    })
+
+
+class StandInCursor:
+    """Serves a table like the connector's cursors: dicts per row for DictCursor, Arrow tables per result batch."""
+
+    def __init__(self, table: pa.Table, as_dicts: bool):
+        self.table = table
+        self.as_dicts = as_dicts
+        self.description = [(name, None, None, None, None, None, True) for name in table.column_names]
+
+    def execute(self, query_string: str):
+        return self
+
+    def __iter__(self):
+        for batch in self.table.to_batches(max_chunksize=BATCH_SIZE):
+            yield from batch.to_pylist()
+
+    def fetch_arrow_batches(self):
+        for batch in self.table.to_batches(max_chunksize=BATCH_SIZE):
+            yield pa.Table.from_batches([batch])
+
+    def close(self):
+        pass
+
+
+class StandInConnection:
+    def __init__(self, table: pa.Table):
+        self.table = table
+
+    def cursor(self, cursor_class=None):
+        return StandInCursor(self.table, as_dicts=cursor_class is not None)
+
+
+def get_snowflake(rows: int, use_account: bool) -> Snowflake:
+    if use_account:
+        return Snowflake(**{name: os.environ[f"SNOWFLAKE_{name.upper()}"]
+                            for name in ("user", "password", "account", "region", "warehouse", "database", "role")})
+
+    sf = Snowflake.__new__(Snowflake)
+    sf.conn = StandInConnection(get_synthetic_table(rows))
+    sf.cursor = None
+    sf.pool = None
+    return sf
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--query", default="SELECT * FROM synthetic")
+    args = parser.parse_args()
+
+    sf = get_snowflake(args.rows, use_account="SNOWFLAKE_ACCOUNT" in os.environ)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for engine in ("rows", "arrow"):
+            path = os.path.join(directory, f"export_{engine}.csv")
+            t1 = time.perf_counter()
+            sf.write_results_to_file(query_string=args.query, output_file_name=path, engine=engine)
+            seconds = time.perf_counter() - t1
+            print(f"{engine:<6} {seconds:8.2f} s   {args.rows / seconds:12,.0f} rows/s   "
+                  f"{os.path.getsize(path) / 1024 ** 2:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
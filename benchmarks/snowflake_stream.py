@@ -0,0 +1,99 @@
+"""Snowflake.stream against fetching the whole result with fetchall: time, rows per second and peak Python memory
+(tracemalloc) while reading every row, with and without batching.
+
+By default runs against a stand-in connection that generates rows on demand, the way the connector downloads result
+chunks, to compare the client-side cost. Set SNOWFLAKE_USER, SNOWFLAKE_PASSWORD, SNOWFLAKE_ACCOUNT, SNOWFLAKE_REGION,
+SNOWFLAKE_WAREHOUSE, SNOWFLAKE_DATABASE and SNOWFLAKE_ROLE and pass --query to run against a real account instead.
+
+Usage: python benchmarks/snowflake_stream.py [--rows 1000000] [--query "SELECT ..."] [--prefetch-threads 8]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from omelette.eggs.snowflake import Snowflake  # noqa: E402
+
+START = datetime(2026, 1, 1)
+
+
+class StandInCursor:
+    """Generates `rows` rows of (ID, NAME, AMOUNT, CREATED) as they're fetched. Session statements are ignored."""
+
+    def __init__(self, rows: int):
+        self.rows = rows
+        self.arraysize = 1
+        self._next = 0
+
+    def execute(self, query_string: str):
+        if query_string.startswith("SHOW PARAMETERS"):
+            self._parameter = ("CLIENT_PREFETCH_THREADS", "4", "4", "", "", "NUMBER")
+        return self
+
+    def fetchone(self):
+        return self._parameter
+
+    def fetchmany(self, size: int = None):
+        end = min(self._next + (size or self.arraysize), self.rows)
+        rows = [(i, f"customer {i}", i % 10_000 / 100, START + timedelta(seconds=i)) for i in range(self._next, end)]
+        self._next = end
+        return rows
+
+    def fetchall(self):
+        return self.fetchmany(self.rows)
+
+    def close(self):
+        pass
+
+
+class StandInConnection:
+    def __init__(self, rows: int):
+        self.rows = rows
+
+    def cursor(self, cursor_class=None):
+        return StandInCursor(self.rows)
+
+
+def get_snowflake(rows: int, use_account: bool) -> Snowflake:
+    if use_account:
+        return Snowflake(**{name: os.environ[f"SNOWFLAKE_{name.upper()}"]
+                            for name in ("user", "password", "account", "region", "warehouse", "database", "role")})
+
+    sf = Snowflake.__new__(Snowflake)
+    sf.conn = StandInConnection(rows)
+    sf.cursor = None
+    sf.pool = None
+    return sf
+
+
+def measure(name: str, read_rows):
+    tracemalloc.start()
+    t1 = time.perf_counter()
+    count = read_rows()
+    seconds = time.perf_counter() - t1
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<28} {seconds:8.2f} s   {count / seconds:12,.0f} rows/s   peak {peak / 1024 ** 2:8.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--query", default="SELECT * FROM synthetic")
+    parser.add_argument("--prefetch-threads", type=int, default=None)
+    args = parser.parse_args()
+
+    sf = get_snowflake(args.rows, use_account="SNOWFLAKE_ACCOUNT" in os.environ)
+
+    measure("fetchall", lambda: len(sf.query(args.query).fetchall()))
+    measure("stream", lambda: sum(1 for _ in sf.stream(args.query, prefetch_threads=args.prefetch_threads)))
+    measure("stream, batch_size=10000", lambda: sum(len(batch) for batch in sf.stream(
+        args.query, batch_size=10_000, prefetch_threads=args.prefetch_threads)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
-from omelette.core.settings import Settings, settings
+from omelette.core.settings import Settings, settings, secrets_cache
 from omelette.core.logging import init_logging
-from omelette.core.recipe import Recipe, context, recipe, argument, step
+from omelette.core.recipe import Recipe, context, recipe, argument, step, ConcurrencyLimiter
+from omelette.core.pipeline import Pipeline
+from omelette.core.retry import RetryPolicy
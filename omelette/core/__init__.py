@@ -1 +1,3 @@
 from .recipe import *
+from .pipeline import Pipeline, PipelineError
+from .retry import RetryPolicy
@@ -0,0 +1,116 @@
+import hashlib
+import logging
+import os
+import pickle
+from typing import Any, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointError(Exception):
+    pass
+
+
+class CheckpointStore:
+    """Persists step results so a failed recipe can be resumed without re-running the steps that already finished.
+    Results are pickled. When a step returns the path of an existing file, the file's size is saved too, and the
+    checkpoint is only valid while the file still exists with the same size."""
+
+    def _read(self, key: str) -> bytes:
+        raise NotImplementedError
+
+    def _write(self, key: str, data: bytes):
+        raise NotImplementedError
+
+    @staticmethod
+    def get_key(job_name: str, run_id: str, step_name: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> str:
+        """Key from a hash of the pickled arguments, so it only depends on their contents. Raises `CheckpointError`
+        if they can't be pickled, e.g. a connection, since there is no stable way to tell one call from another."""
+        try:
+            data = pickle.dumps((args, sorted(kwargs.items())), protocol=4)
+        except Exception as e:
+            raise CheckpointError(f"Can't checkpoint step {step_name}, its arguments can't be pickled: {e}. "
+                                  f"Pass `checkpoint_key` to the step to choose which arguments identify it.")
+
+        args_hash = hashlib.sha256(data).hexdigest()[:16]
+        return f"{job_name}/{run_id}/{step_name}-{args_hash}.pkl"
+
+    def load(self, key: str) -> Tuple[bool, Any]:
+        """Returns (True, result) for a valid checkpoint, otherwise (False, None)."""
+        try:
+            checkpoint = pickle.loads(self._read(key))
+        except FileNotFoundError:
+            return False, None
+        except Exception as e:
+            logger.warning(f"Could not read checkpoint {key}: {e}")
+            return False, None
+
+        file_size = checkpoint.get("file_size")
+
+        if file_size is not None:
+            path = checkpoint["result"]
+
+            if not os.path.isfile(path) or os.path.getsize(path) != file_size:
+                logger.info(f"Ignoring checkpoint {key}, file {path} is missing or changed.")
+                return False, None
+
+        return True, checkpoint["result"]
+
+    def save(self, key: str, result: Any):
+        checkpoint = {"result": result, "file_size": None}
+
+        if isinstance(result, str) and os.path.isfile(result):
+            checkpoint["file_size"] = os.path.getsize(result)
+
+        try:
+            self._write(key, pickle.dumps(checkpoint))
+        except Exception as e:
+            # A missing checkpoint only costs a re-run of the step on resume, so don't fail the recipe for it.
+            logger.warning(f"Could not save checkpoint {key}: {e}")
+
+
+class LocalCheckpointStore(CheckpointStore):
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _read(self, key: str) -> bytes:
+        with open(os.path.join(self.directory, key), "rb") as f:
+            return f.read()
+
+    def _write(self, key: str, data: bytes):
+        path = os.path.join(self.directory, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+
+
+class S3CheckpointStore(CheckpointStore):
+    def __init__(self, bucket: str, prefix: str = ""):
+        import boto3
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.client = boto3.client("s3")
+
+    def _get_object_key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def _read(self, key: str) -> bytes:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._get_object_key(key))["Body"].read()
+        except self.client.exceptions.NoSuchKey:
+            raise FileNotFoundError(key)
+
+    def _write(self, key: str, data: bytes):
+        self.client.put_object(Bucket=self.bucket, Key=self._get_object_key(key), Body=data)
+
+
+def get_checkpoint_store(location: str) -> CheckpointStore:
+    """Local directory, or S3 prefix given as s3://bucket/prefix."""
+    if location.startswith("s3://"):
+        bucket, _, prefix = location[len("s3://"):].partition("/")
+        return S3CheckpointStore(bucket, prefix)
+
+    return LocalCheckpointStore(location)
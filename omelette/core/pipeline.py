@@ -0,0 +1,122 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_EXCEPTION, Future, wait
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from omelette.core.recipe import run_until_complete
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineError(Exception):
+    pass
+
+
+class Pipeline:
+    """Runs `@step` functions as a DAG based on each step's `depends_on`. Steps whose dependencies have finished run
+    concurrently on a thread pool (`async def` steps run in their own event loop on their worker thread), and each
+    step is called with the results of its dependencies as positional arguments, in `depends_on` order. Dependencies
+    not passed in explicitly are added automatically. Retries and Slack alerts are handled by each step as usual.
+
+    Example:
+
+    @step(max_retries=3)
+    def extract_sftp(context: Recipe):
+        ...
+
+    @step(max_retries=3)
+    def extract_s3(context: Recipe):
+        ...
+
+    @step(depends_on=[extract_sftp, extract_s3])
+    def load(context: Recipe, sftp_file: str, s3_file: str):
+        ...
+
+    @recipe
+    def main(context: Recipe):
+        results = Pipeline(load, max_workers=2).run()
+        return results["load"]
+    """
+
+    def __init__(self, *steps: Callable, max_workers: Optional[int] = None):
+        self.max_workers = max_workers
+        self.steps: Dict[str, Callable] = {}
+        self.dependencies: Dict[str, List[str]] = {}
+
+        for _step in steps:
+            self._add_step(_step)
+
+        self._check_for_cycles()
+
+    def _add_step(self, _step: Callable):
+        name = _step.__name__
+
+        if name in self.steps:
+            if self.steps[name] is not _step:
+                raise PipelineError(f"Duplicate step name: {name}")
+            return
+
+        self.steps[name] = _step
+        self.dependencies[name] = []
+
+        for dependency in getattr(_step, "depends_on", ()):
+            if isinstance(dependency, str):
+                self.dependencies[name].append(dependency)
+            else:
+                self.dependencies[name].append(dependency.__name__)
+                self._add_step(dependency)
+
+    def _check_for_cycles(self):
+        visited = set()
+
+        def visit(name: str, path: List[str]):
+            if name in path:
+                raise PipelineError(f"Cycle in step dependencies: {' -> '.join(path + [name])}")
+            if name in visited:
+                return
+            if name not in self.steps:
+                raise PipelineError(f"Unknown step {name} in dependencies of {path[-1]}")
+
+            for dependency in self.dependencies[name]:
+                visit(dependency, path + [name])
+            visited.add(name)
+
+        for name in self.steps:
+            visit(name, [])
+
+    def _run_step(self, name: str, *args) -> Any:
+        return run_until_complete(self.steps[name](*args))
+
+    def run(self) -> Dict[str, Any]:
+        """Run all steps and return their results by step name. If a step fails, no new steps are started and the
+        error is raised once running steps have finished."""
+        results: Dict[str, Any] = {}
+        pending = dict(self.dependencies)
+        running: Dict[Future, str] = {}
+        t1 = datetime.now()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                for name in [n for n, deps in pending.items() if all(d in results for d in deps)]:
+                    del pending[name]
+                    logger.info(f"Starting step {name}")
+                    args = [results[d] for d in self.dependencies[name]]
+                    running[executor.submit(self._run_step, name, *args)] = name
+
+                done, _ = wait(running, return_when=FIRST_EXCEPTION)
+
+                for future in done:
+                    name = running.pop(future)
+                    error = future.exception()
+
+                    if error:
+                        logger.error(f"Step {name} failed, not starting steps: {list(pending)}")
+                        wait(running)
+                        raise error
+
+                    results[name] = future.result()
+                    logger.info(f"Finished step {name}")
+
+        logger.info(f"Pipeline complete. Took {datetime.now() - t1} seconds.")
+
+        return results
@@ -1,25 +1,38 @@
 import argparse
+import asyncio
 import inspect
 import logging
 import os
 import sys
+import tempfile
+from datetime import date
 from functools import wraps, partial
 from importlib import import_module
-from typing import Any, Dict, Callable, Optional
+from types import ModuleType
+from typing import Any, Awaitable, Dict, Callable, NamedTuple, Optional, Sequence, Tuple, Union
+from weakref import WeakKeyDictionary
 
-from omelette.core.settings import Settings, settings
+from omelette.core.checkpoint import CheckpointStore, get_checkpoint_store
+from omelette.core.settings import Settings, settings, clear_settings_cache, load_env_file
 from omelette.core.logging import init_logging
-from omelette.eggs import Slack
+from omelette.core.retry import RetryPolicy
 
 logger = logging.getLogger(__name__)
 
 
+class _WarmState(NamedTuple):
+    job_module: Optional[ModuleType]
+    loggers: Optional[Dict[str, str]]
+
+
 class Recipe:
     """Context class that acts as base class for recipes that use Python classes. Otherwise, acts as singleton
     for providing context (e.g. settings, job_name, etc.) to plain functions."""
     _instance = None
     _arg_parser = None
     _required_args = None
+    # Per-process state of initialized jobs by (file_dir, job_name), reused by warm Lambda invocations.
+    _warm_state: Dict[Tuple[str, str], _WarmState] = {}
 
     def __init__(self, is_lambda: bool = False):
         self._input_args = sys.argv[1:]
@@ -32,6 +45,10 @@ class Recipe:
         self.lambda_event: Optional[Dict[Any, Any]] = None
         self.lambda_context: Optional[Dict[Any, Any]] = None
         self.logger: Optional[logging.Logger] = None
+        self.run_id: Optional[str] = None
+        self.resume: bool = False
+        self.checkpoint_location: Optional[str] = None
+        self._checkpoint_store: Optional[CheckpointStore] = None
 
         if type(self) is not Recipe and not self.is_lambda:
             file_dir = os.path.dirname(inspect.getfile(self.__class__))
@@ -69,6 +86,9 @@ class Recipe:
             cls._arg_parser.add_argument(*names, **kwargs)
 
     def init_recipe(self, file_dir: str, lambda_event: Dict[Any, Any] = None, lambda_context: Dict[Any, Any] = None):
+        # Load .env before reading env vars like JOB_NAME. Only searches once per process, and not on import.
+        load_env_file()
+
         if self.is_lambda:
             job_name = lambda_event.get("job_name", os.getenv("JOB_NAME"))
 
@@ -77,6 +97,9 @@ class Recipe:
 
             self.lambda_event = lambda_event
             self.lambda_context = lambda_context
+            self.run_id = lambda_event.get("run_id", os.getenv("RUN_ID", date.today().isoformat()))
+            self.resume = bool(lambda_event.get("resume", False))
+            self.checkpoint_location = lambda_event.get("checkpoint_location", os.getenv("CHECKPOINT_LOCATION"))
         else:
             self.add_argument(
                 "--job-name",
@@ -85,26 +108,76 @@ class Recipe:
                 required=False if os.getenv("JOB_NAME") else True,
                 default=os.getenv("JOB_NAME")
             )
+            self.add_argument(
+                "--run-id",
+                help="ID of this run, used for saving step checkpoints. Defaults to today's date.",
+                default=os.getenv("RUN_ID", date.today().isoformat())
+            )
+            self.add_argument(
+                "--resume",
+                help="Skip steps that have a valid checkpoint from a previous attempt of the same run ID.",
+                action="store_true"
+            )
+            self.add_argument(
+                "--checkpoint-location",
+                help="Local directory or s3://bucket/prefix for step checkpoints.",
+                default=os.getenv("CHECKPOINT_LOCATION")
+            )
             self.parse_args()
             job_name = self.args.job_name
+            self.run_id = self.args.run_id
+            self.resume = self.args.resume
+            self.checkpoint_location = self.args.checkpoint_location
 
         self.job_name = job_name
-        available_jobs = os.listdir(file_dir + "/jobs")
+        self._checkpoint_store = None
+        warm_state = self._warm_state.get((file_dir, job_name))
 
-        if not job_name or job_name not in available_jobs:
-            raise Exception(f"Invalid job name: {job_name}")
+        if warm_state is None:
+            available_jobs = os.listdir(file_dir + "/jobs")
+
+            if not job_name or job_name not in available_jobs:
+                raise Exception(f"Invalid job name: {job_name}")
 
         self.job_dir = os.path.join(file_dir, f"jobs/{job_name}/")
 
+        # Always reload so values changed by a previous invocation are reset. Cheap when the file hasn't changed.
         self.settings.load(config_filepath=self.job_dir + "settings.toml")
-        init_logging(is_lambda=self.is_lambda, loggers=self.settings.get("loggers"))
+        loggers = self.settings.get("loggers")
+
+        if warm_state is None or warm_state.loggers != loggers:
+            init_logging(is_lambda=self.is_lambda, loggers=loggers)
         self.logger = logging.getLogger("__main__")
 
-        if os.path.exists(self.job_dir + f"{job_name}.py"):
+        if warm_state is not None:
+            self.job_module = warm_state.job_module
+        elif os.path.exists(self.job_dir + f"{job_name}.py"):
             self.job_module = import_module(f".{job_name}.{job_name}", "jobs")
 
+        self._warm_state[(file_dir, job_name)] = _WarmState(self.job_module, loggers)
+
         return self
 
+    @property
+    def checkpoint_store(self) -> CheckpointStore:
+        if self._checkpoint_store is None:
+            location = self.checkpoint_location or os.path.join(tempfile.gettempdir(), "omelette_checkpoints")
+            self._checkpoint_store = get_checkpoint_store(location)
+        return self._checkpoint_store
+
+    @classmethod
+    def invalidate_warm_state(cls, file_dir: Optional[str] = None, job_name: Optional[str] = None):
+        """Force the next `init_recipe` to fully re-initialize. Without arguments, clears every job and the cached
+        settings files, otherwise only the given job."""
+        if file_dir is None and job_name is None:
+            cls._warm_state.clear()
+            clear_settings_cache()
+            return
+
+        for key in list(cls._warm_state):
+            if file_dir in (None, key[0]) and job_name in (None, key[1]):
+                del cls._warm_state[key]
+
     def run(self):
         raise NotImplemented
 
@@ -114,7 +187,7 @@ class Recipe:
             file_dir = os.path.dirname(inspect.getfile(cls))
             _recipe = cls(is_lambda=True)
             _recipe.init_recipe(file_dir, event, context)
-            return _recipe.run()
+            return run_until_complete(_recipe.run())
 
         return handler
 
@@ -127,13 +200,16 @@ context = Recipe.get_context()
 
 
 def recipe(func=None, *, is_lambda: bool = False, max_retries: int = None, slack_alert: bool = False,
-           slack_message_text: str = None):
+           slack_message_text: str = None, retry: RetryPolicy = None):
     """
     Decorator for the entrypoint callable in non-class-based workflows, e.g. plain Python functions. An alternative to
     sub-classing Recipe. Adds requirement for --job-name/-j argument, and will pass the Recipe context with
     initialized settings, logging, etc to the wrapped function. Optional try/except that will send a slack alert,
     controlled by parameter `slack_alert`. Can be used with or without call using (), e.g. @recipe will work and so will
-    @recipe() or @recipe(slack_alert=True).
+    @recipe() or @recipe(slack_alert=True). Pass a `RetryPolicy` as `retry` for backoff between attempts, otherwise
+    `max_retries` retries immediately.
+
+    The wrapped function may be an `async def`, in which case it is run to completion in a new event loop.
 
     Example:
 
@@ -149,7 +225,10 @@ def recipe(func=None, *, is_lambda: bool = False, max_retries: int = None, slack
                        is_lambda=is_lambda,
                        max_retries=max_retries,
                        slack_alert=slack_alert,
-                       slack_message_text=slack_message_text)
+                       slack_message_text=slack_message_text,
+                       retry=retry)
+
+    policy = _get_retry_policy(retry, max_retries)
 
     @wraps(func)
     def wrapper(*args, **kwargs):
@@ -166,24 +245,23 @@ def recipe(func=None, *, is_lambda: bool = False, max_retries: int = None, slack
         _recipe.init_recipe(file_dir, lambda_event, lambda_context)
 
         if slack_alert and _recipe.settings.slack.api_token:
-            slack = Slack(**_recipe.settings.slack)
             try:
-                if max_retries:
-                    return retry(func, max_retries, _recipe, *args, **kwargs)
+                if policy:
+                    return run_until_complete(policy.call(func, _recipe, *args, **kwargs))
                 else:
-                    return func(_recipe, *args, **kwargs)
+                    return run_until_complete(func(_recipe, *args, **kwargs))
             except Exception as e:
                 msg = slack_message_text or f"Error running recipe {_recipe.settings.slack.app_name}"
-                slack.send_slack_alert(f"{msg}:\n {e}")
+                _send_slack_alert(_recipe.settings.slack, f"{msg}:\n {e}")
                 raise e
             finally:
                 Recipe.cleanup()
         else:
             try:
-                if max_retries:
-                    return retry(func, max_retries, _recipe, *args, **kwargs)
+                if policy:
+                    return run_until_complete(policy.call(func, _recipe, *args, **kwargs))
                 else:
-                    return func(_recipe, *args, **kwargs)
+                    return run_until_complete(func(_recipe, *args, **kwargs))
             finally:
                 Recipe.cleanup()
     return wrapper
@@ -197,10 +275,23 @@ def argument(*names, **outer_kwargs):
     return wrapper
 
 
-def step(func=None, *, max_retries: int = None, slack_alert: bool = False, slack_message_text: str = None):
+def step(func=None, *, max_retries: int = None, slack_alert: bool = False, slack_message_text: str = None,
+         depends_on: Sequence[Union[Callable, str]] = (), max_concurrency: int = None, retry: RetryPolicy = None,
+         checkpoint: bool = False, checkpoint_key: Callable[..., Any] = None):
     """
     Decorator for wrapping any plain ol' Python functions that need access to shared context from Recipe. Avoids having
-    to pass context down tree of child functions.
+    to pass context down tree of child functions. `depends_on` lists the steps (functions or names) whose results this
+    step takes as arguments when run by a `Pipeline`; it has no effect when the step is called directly. Pass a
+    `RetryPolicy` as `retry` for backoff between attempts, otherwise `max_retries` retries immediately.
+
+    `async def` steps are wrapped in a coroutine function with the same retry and Slack handling. For those,
+    `max_concurrency` bounds how many calls of the step can be in flight at once within an event loop.
+
+    With `checkpoint`, the step's result is saved to the recipe's checkpoint store, keyed by job name, run ID and
+    the step's arguments. When the recipe is run with `--resume`, steps with a valid checkpoint return the saved
+    result instead of running again. Results must be picklable; for a step that produces a file, return its path.
+    Arguments must be picklable too, since the key hashes their pickled contents. Otherwise, pass `checkpoint_key`, a
+    function called with the step's arguments that returns what identifies the call, e.g. `lambda conn, day: day`.
 
     Example:
 
@@ -216,10 +307,39 @@ def step(func=None, *, max_retries: int = None, slack_alert: bool = False, slack
         main()
     """
     if func is None:
-        return partial(step, max_retries=max_retries, slack_alert=slack_alert, slack_message_text=slack_message_text)
+        return partial(step, max_retries=max_retries, slack_alert=slack_alert, slack_message_text=slack_message_text,
+                       depends_on=depends_on, max_concurrency=max_concurrency, retry=retry, checkpoint=checkpoint,
+                       checkpoint_key=checkpoint_key)
+
+    policy = _get_retry_policy(retry, max_retries)
+
+    if inspect.iscoroutinefunction(func):
+        wrapper = _async_step(func, policy=policy, slack_alert=slack_alert,
+                              slack_message_text=slack_message_text, max_concurrency=max_concurrency,
+                              checkpoint=checkpoint, checkpoint_key=checkpoint_key)
+        wrapper.depends_on = tuple(depends_on)
+        return wrapper
 
     @wraps(func)
     def wrapper(*args, **kwargs):
+        if not checkpoint:
+            return run_step(*args, **kwargs)
+
+        _context = Recipe.get_context()
+        key = _get_checkpoint_key(_context, func, checkpoint_key, args, kwargs)
+
+        if _context.resume:
+            found, result = _context.checkpoint_store.load(key)
+
+            if found:
+                logger.info(f"Skipping step {func.__name__}, using result from checkpoint {key}.")
+                return result
+
+        result = run_step(*args, **kwargs)
+        _context.checkpoint_store.save(key, result)
+        return result
+
+    def run_step(*args, **kwargs):
         _func = func
         _context = Recipe.get_context()  # Get latest instance in case of lambda frozen context
 
@@ -227,35 +347,136 @@ def step(func=None, *, max_retries: int = None, slack_alert: bool = False, slack
             _func = getattr(_context.job_module, func.__name__)
 
         if slack_alert and _context.settings.slack.api_token:
-            slack = Slack(**_context.settings.slack)
             try:
-                if max_retries:
-                    return retry(_func, max_retries, _context, *args, **kwargs)
+                if policy:
+                    return policy.call(_func, _context, *args, **kwargs)
                 else:
                     return _func(_context, *args, **kwargs)
             except Exception as e:
                 msg = slack_message_text or f"Error running recipe step {_context.settings.slack.app_name}"
-                slack.send_slack_alert(f"{msg}:\n {e}")
+                _send_slack_alert(_context.settings.slack, f"{msg}:\n {e}")
                 raise e
         else:
-            if max_retries:
-                return retry(_func, max_retries, _context, *args, **kwargs)
+            if policy:
+                return policy.call(_func, _context, *args, **kwargs)
             else:
                 return _func(_context, *args, **kwargs)
+
+    wrapper.depends_on = tuple(depends_on)
     return wrapper
 
 
-def retry(func: Callable, max_retries: int = 3, *args, **kwargs):
-    retries = max_retries
+def _get_checkpoint_key(_context: Recipe, func: Callable, checkpoint_key: Optional[Callable[..., Any]],
+                        args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> str:
+    if checkpoint_key:
+        args, kwargs = (checkpoint_key(*args, **kwargs),), {}
+
+    return _context.checkpoint_store.get_key(_context.job_name, _context.run_id, func.__name__, args, kwargs)
+
+
+def _async_step(func: Callable, *, policy: Optional[RetryPolicy] = None, slack_alert: bool = False,
+                slack_message_text: str = None, max_concurrency: int = None, checkpoint: bool = False,
+                checkpoint_key: Callable[..., Any] = None):
+    limiter = ConcurrencyLimiter(max_concurrency) if max_concurrency else None
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        if not checkpoint:
+            return await run_step(*args, **kwargs)
+
+        _context = Recipe.get_context()
+        key = _get_checkpoint_key(_context, func, checkpoint_key, args, kwargs)
+
+        if _context.resume:
+            found, result = _context.checkpoint_store.load(key)
+
+            if found:
+                logger.info(f"Skipping step {func.__name__}, using result from checkpoint {key}.")
+                return result
+
+        result = await run_step(*args, **kwargs)
+        _context.checkpoint_store.save(key, result)
+        return result
+
+    async def run_step(*args, **kwargs):
+        _func = func
+        _context = Recipe.get_context()  # Get latest instance in case of lambda frozen context
+
+        if hasattr(_context.job_module, func.__name__):
+            _func = getattr(_context.job_module, func.__name__)
 
-    while retries > 0:
         try:
-            return func(*args, **kwargs)
+            if limiter:
+                async with limiter.semaphore:
+                    return await _call_async(_func, policy, _context, *args, **kwargs)
+            else:
+                return await _call_async(_func, policy, _context, *args, **kwargs)
         except Exception as e:
-            retries -= 1
+            if slack_alert and _context.settings.slack.api_token:
+                msg = slack_message_text or f"Error running recipe step {_context.settings.slack.app_name}"
+                _send_slack_alert(_context.settings.slack, f"{msg}:\n {e}")
+            raise e
+    return wrapper
 
-            if retries == 0:
-                raise e
 
-            logger.exception(f"Failed on execution of {func.__name__}. Retrying now. {retries} retries left.")
+async def _call_async(func: Callable, policy: Optional[RetryPolicy], *args, **kwargs):
+    if policy:
+        return await policy.call_async(func, *args, **kwargs)
+    else:
+        return await func(*args, **kwargs)
+
+
+class ConcurrencyLimiter:
+    """Bounds the number of coroutines holding `semaphore` at once. Keeps one asyncio.Semaphore per event loop, since
+    a semaphore can't be shared across loops (e.g. one `asyncio.run` per Lambda invocation).
+
+    Example:
+
+    limiter = ConcurrencyLimiter(50)
+
+    async def fetch(key):
+        async with limiter.semaphore:
+            ...
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._semaphores: "WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = WeakKeyDictionary()
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+
+        if loop not in self._semaphores:
+            self._semaphores[loop] = asyncio.Semaphore(self.limit)
+
+        return self._semaphores[loop]
+
+
+def run_until_complete(result: Union[Any, Awaitable]) -> Any:
+    """Run `result` in a new event loop if it is a coroutine (e.g. from an `async def` recipe), else return it."""
+    if inspect.iscoroutine(result):
+        return asyncio.run(result)
+    return result
+
+
+def retry(func: Callable, max_retries: Union[int, RetryPolicy] = 3, *args, **kwargs):
+    """Call `func`, retrying up to `max_retries` times in total, or as configured by a `RetryPolicy`. For coroutine
+    functions, returns a coroutine that awaits `func` with the same retry behavior."""
+    return _get_retry_policy(None, max_retries).call(func, *args, **kwargs)
+
+
+def _get_retry_policy(policy: Optional[RetryPolicy],
+                      max_retries: Union[int, RetryPolicy, None]) -> Optional[RetryPolicy]:
+    if policy or isinstance(max_retries, RetryPolicy):
+        return policy or max_retries
+    return RetryPolicy(max_attempts=max_retries) if max_retries else None
+
+
+def _send_slack_alert(slack_settings: Dict[str, Any], message: str):
+    """Send a failure alert with the Slack egg. The egg (and slackclient) is only imported when an alert is actually
+    sent, so recipes that never fail don't pay its import cost."""
+    from omelette.eggs.slack import Slack
+
+    Slack(**slack_settings).send_slack_alert(message)
 
@@ -0,0 +1,91 @@
+import asyncio
+import inspect
+import logging
+import random
+import time
+from typing import Callable, Optional, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+
+class RetryPolicy:
+    """Retry behavior shared by `@recipe`, `@step`, and eggs. Waits between attempts with exponential backoff, starting
+    at `base_delay` seconds and capped at `max_delay`. `jitter` is the fraction of each delay that is randomized (1.0
+    is "full jitter", 0 waits exactly), which keeps many workers from retrying a throttled service in lockstep.
+    Only exceptions in `retry_on` are retried, anything else is raised immediately. No attempt is started after
+    `deadline` seconds from the first one.
+
+    The default policy retries immediately, same as the original `retry` helper.
+
+    Example:
+
+    @step(retry=RetryPolicy(max_attempts=5, base_delay=1, max_delay=30, retry_on=(OperationalError,)))
+    def extract(context: Recipe):
+        ...
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0, max_delay: float = 60, backoff: float = 2,
+                 jitter: float = 1.0, deadline: Optional[float] = None,
+                 retry_on: Tuple[Type[BaseException], ...] = (Exception,)):
+        if max_attempts < 1:
+            raise ValueError(f"max_attempts must be at least 1: {max_attempts}")
+
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.backoff = backoff
+        self.jitter = jitter
+        self.deadline = deadline
+        self.retry_on = retry_on
+
+    def get_delay(self, attempt: int) -> float:
+        """Seconds to wait after failed attempt number `attempt` (starting at 1)."""
+        delay = min(self.max_delay, self.base_delay * self.backoff ** (attempt - 1))
+        return delay * (1 - self.jitter * random.random())
+
+    def _next_delay(self, error: Exception, attempt: int, start: float, name: str, attempt_time: float) -> float:
+        """Returns the delay before the next attempt, or re-raises `error` if it should not be retried."""
+        if not isinstance(error, self.retry_on) or attempt >= self.max_attempts:
+            raise error
+
+        delay = self.get_delay(attempt)
+
+        if self.deadline is not None and time.monotonic() - start + delay > self.deadline:
+            logger.error(f"Not retrying {name}, deadline of {self.deadline} seconds would be exceeded.")
+            raise error
+
+        logger.exception(f"Failed on execution of {name} (attempt {attempt} of {self.max_attempts}, took "
+                         f"{attempt_time:.3f} seconds). Retrying in {delay:.3f} seconds.")
+        return delay
+
+    def call(self, func: Callable, *args, **kwargs):
+        """Call `func` with retries. For coroutine functions, returns a coroutine that awaits `func` instead."""
+        if inspect.iscoroutinefunction(func):
+            return self.call_async(func, *args, **kwargs)
+
+        name = getattr(func, "__name__", repr(func))
+        start = time.monotonic()
+
+        for attempt in range(1, self.max_attempts + 1):
+            attempt_start = time.monotonic()
+
+            try:
+                result = func(*args, **kwargs)
+                logger.debug(f"Attempt {attempt} of {name} took {time.monotonic() - attempt_start:.3f} seconds.")
+                return result
+            except Exception as e:
+                time.sleep(self._next_delay(e, attempt, start, name, time.monotonic() - attempt_start))
+
+    async def call_async(self, func: Callable, *args, **kwargs):
+        name = getattr(func, "__name__", repr(func))
+        start = time.monotonic()
+
+        for attempt in range(1, self.max_attempts + 1):
+            attempt_start = time.monotonic()
+
+            try:
+                result = await func(*args, **kwargs)
+                logger.debug(f"Attempt {attempt} of {name} took {time.monotonic() - attempt_start:.3f} seconds.")
+                return result
+            except Exception as e:
+                await asyncio.sleep(self._next_delay(e, attempt, start, name, time.monotonic() - attempt_start))
@@ -1,16 +1,143 @@
-import boto3
+import copy
 import logging
 import os
 import re
-from typing import Any
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
 
-from botocore.exceptions import ClientError
 from box import Box
 from dotenv import find_dotenv, load_dotenv
 from tomlkit import parse, items
 
+try:
+    import tomllib as toml_reader
+except ImportError:
+    try:
+        import tomli as toml_reader
+    except ImportError:
+        toml_reader = None
+
 logger = logging.getLogger(__name__)
 
+_env_file_loaded = False
+
+
+def load_env_file(force: bool = False) -> bool:
+    """Load variables from the nearest .env file into the environment. Searching for the file walks up the
+    filesystem, so it only happens once per process unless `force` is set. Returns True if a file was loaded."""
+    global _env_file_loaded
+
+    if _env_file_loaded and not force:
+        return False
+
+    _env_file_loaded = True
+    return load_dotenv(find_dotenv(usecwd=True), verbose=True)
+
+
+def _getenv_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        logger.warning(f"Invalid value for {name}: {os.getenv(name)}. Using default of {default}.")
+        return default
+
+
+class SecretsCache:
+    """Process-level cache of resolved SSM parameters, keyed by parameter name. Lets warm Lambda invocations reuse
+    secrets instead of calling SSM on every `Settings.load`. Entries expire after `ttl` seconds (0 disables caching),
+    and the least recently used entry is evicted once `max_size` is reached (0 for unbounded). Unless given, they are
+    read from env vars SSM_CACHE_TTL (default 300) and SSM_CACHE_MAX_SIZE on first use, so they can be set in .env."""
+
+    def __init__(self, ttl: Optional[float] = None, max_size: Optional[int] = None):
+        self._ttl = ttl
+        self._max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Optional[str]:
+        with self._lock:
+            entry = self._data.get(name)
+
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._data[name]
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(name)
+            self.hits += 1
+            return entry[1]
+
+    @property
+    def ttl(self) -> float:
+        if self._ttl is None:
+            self._ttl = _getenv_number("SSM_CACHE_TTL", 300)
+        return self._ttl
+
+    @ttl.setter
+    def ttl(self, value: float):
+        self._ttl = value
+
+    @property
+    def max_size(self) -> int:
+        if self._max_size is None:
+            self._max_size = int(_getenv_number("SSM_CACHE_MAX_SIZE", 0))
+        return self._max_size
+
+    @max_size.setter
+    def max_size(self, value: int):
+        self._max_size = value
+
+    def set(self, name: str, value: str):
+        if self.ttl <= 0:
+            return
+
+        with self._lock:
+            self._data[name] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(name)
+
+            if self.max_size:
+                while len(self._data) > self.max_size:
+                    self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
+
+
+secrets_cache = SecretsCache()
+
+
+class _SettingsSnapshot(NamedTuple):
+    file_key: Tuple[int, int, str]
+    env_vars: Dict[str, Optional[str]]
+    store: Box
+    ssm_refs: Dict[Tuple[Optional[str], str], str]
+
+
+# Loaded settings by absolute file path, reused while the file, environment and env var overrides are unchanged.
+_snapshots: Dict[str, _SettingsSnapshot] = {}
+
+
+def clear_settings_cache():
+    """Forget all cached settings snapshots, forcing the next `Settings.load` to re-read its file."""
+    _snapshots.clear()
+
 
 class Settings:
     """Settings class that can be accessed using either dict notation (settings.get('abc')) or
@@ -28,38 +155,103 @@ class Settings:
         items.Float: float,
     }
 
-    INTERNAL_ATTRS = ["_store", "_ssm", "env"]
+    INTERNAL_ATTRS = ["_store", "_ssm", "_ssm_refs", "env"]
+
+    # GetParameters accepts at most 10 names per call.
+    SSM_BATCH_SIZE = 10
+    SSM_MAX_WORKERS = 4
+    # Errors caused by one parameter that fail its whole GetParameters batch. Anything else, like throttling, would
+    # fail every individual call too.
+    SSM_PARAMETER_ERRORS = {"AccessDeniedException", "AccessDenied", "ParameterNotFound", "InvalidKeyId",
+                            "KMSAccessDeniedException"}
 
     def __init__(self, config_filepath: str = None, env: str = os.getenv("PROJECT_ENV", "local")):
         self._store = Box()
+        self._ssm_refs: Dict[Tuple[Optional[str], str], str] = {}
         self.env = env
-        self._ssm = boto3.client("ssm", region_name="us-east-1")
-
-        # Load from .env file if exists. Will set env variables for use in .ini files.
-        load_dotenv(find_dotenv(usecwd=True), verbose=True)
+        self._ssm = None
 
         if config_filepath:
             self.load(config_filepath)
 
-    def load(self, config_filepath: str):
+    def load(self, config_filepath: str, use_cache: bool = True):
+        """Load settings from file. Unless `use_cache` is False, the result is cached per process and reused by later
+        loads of the same file while its mtime, the environment, and any env vars that could override it are
+        unchanged. `ssm:` values are always resolved through `secrets_cache`."""
         if not os.path.exists(config_filepath):
             raise OSError("Could not load the default or provided settings file.")
 
+        # Load from .env file if exists. Will set env variables for use in .toml files.
+        load_env_file()
+
         self.clear()
 
+        config_filepath = os.path.abspath(config_filepath)
+        stat = os.stat(config_filepath)
+        file_key = (stat.st_mtime_ns, stat.st_size, self.env)
+        snapshot = _snapshots.get(config_filepath) if use_cache else None
+
+        if (snapshot and snapshot.file_key == file_key
+                and all(os.getenv(k) == v for k, v in snapshot.env_vars.items())):
+            self._store = copy.deepcopy(snapshot.store)
+            self._ssm_refs = dict(snapshot.ssm_refs)
+        else:
+            settings_data = self._read_config(config_filepath)
+
+            if "default" not in settings_data:
+                raise Exception("Settings file missing required section 'default'")
+
+            env_var_names = set()
+
+            for table, items in settings_data.items():
+                if table.startswith(self.env) or table == "default":
+                    for k, v in items.items():
+                        self._set_value_from_config(k, v)
+                        env_var_names.update(self._env_var_names(k, v))
+
+            _snapshots[config_filepath] = _SettingsSnapshot(
+                file_key=file_key,
+                env_vars={name: os.getenv(name) for name in env_var_names},
+                store=copy.deepcopy(self._store),
+                ssm_refs=dict(self._ssm_refs),
+            )
+
+        self._resolve_ssm_refs()
+
+    @staticmethod
+    def _read_config(config_filepath: str) -> Dict[str, Any]:
+        """Settings are never written back, so use a read-only TOML parser when available since tomlkit's
+        style-preserving parser is much slower."""
+        if toml_reader:
+            with open(config_filepath, "rb") as f:
+                return toml_reader.load(f)
+
         with open(config_filepath, "r") as f:
-            settings_data = parse(f.read())
+            return parse(f.read())
 
-        if "default" not in settings_data:
-            raise Exception("Settings file missing required section 'default'")
+    @classmethod
+    def _env_var_names(cls, name: str, value: Any, parent: str = None) -> Iterator[str]:
+        """Names of env vars that `_set_value_from_config` checks for this value."""
+        yield f"{parent.upper()}_{name.upper()}" if parent else name.upper()
 
-        for table, items in settings_data.items():
-            if table.startswith(self.env) or table == "default":
-                for k, v in items.items():
-                    self._set_value_from_config(k, v)
+        if isinstance(value, dict):
+            for k, v in value.items():
+                yield from cls._env_var_names(k, v, name)
+        elif isinstance(value, str) and value.startswith("${") and value.endswith("}"):
+            yield re.findall(r'\${(.*?)}', value)[0]
 
     def clear(self):
         self._store = Box()
+        self._ssm_refs = {}
+
+    def _get_ssm_client(self):
+        """SSM client is created on first use, since most settings files have no `ssm:` values and creating a boto3
+        client is expensive on cold starts."""
+        if self._ssm is None:
+            import boto3
+
+            self._ssm = boto3.client("ssm", region_name="us-east-1")
+        return self._ssm
 
     def _set_value_from_config(self, name: str, value: Any, parent: str = None):
         if name.upper() in os.environ and not parent:
@@ -89,21 +281,90 @@ class Settings:
             if var_name in os.environ:
                 self.set_attr(name, os.getenv(var_name), parent)
         elif isinstance(value, str) and value.startswith("ssm:"):
+            # Collected here and fetched in batches once the whole file has been read, see `_resolve_ssm_refs`.
+            self._ssm_refs[(parent, name)] = value.replace("ssm:", "")
+        else:
+            self.set_attr(name, value, parent)
+
+    def _resolve_ssm_refs(self):
+        """Fetch all collected `ssm:` values with batched GetParameters calls, issued concurrently, then set them.
+        Values still in `secrets_cache` are not fetched again."""
+        if not self._ssm_refs:
+            return
+
+        refs = self._ssm_refs
+        self._ssm_refs = {}
+
+        values = {}
+        names = []
+
+        for param_name in dict.fromkeys(refs.values()):
+            cached = secrets_cache.get(param_name)
+
+            if cached is None:
+                names.append(param_name)
+            else:
+                values[param_name] = cached
+
+        if names:
+            batches = [names[i:i + self.SSM_BATCH_SIZE] for i in range(0, len(names), self.SSM_BATCH_SIZE)]
+            # Clients are thread safe to share, but creating them concurrently from boto3's default session is not.
+            client = self._get_ssm_client()
+
+            with ThreadPoolExecutor(max_workers=min(len(batches), self.SSM_MAX_WORKERS)) as executor:
+                for batch_values in executor.map(partial(self._get_ssm_parameters, client), batches):
+                    for param_name, value in batch_values.items():
+                        secrets_cache.set(param_name, value)
+                    values.update(batch_values)
+
+        logger.debug(f"SSM secrets cache: {secrets_cache.stats}")
+
+        for (parent, name), param_name in refs.items():
+            if param_name in values:
+                self.set_attr(name, values[param_name], parent)
+
+    def _get_ssm_parameters(self, client, names: List[str]) -> Dict[str, str]:
+        from botocore.exceptions import ClientError
+
+        try:
+            response = client.get_parameters(Names=names, WithDecryption=True)
+        except ClientError as e:
+            logger.error(e)
+
+            if e.response.get("Error", {}).get("Code") not in self.SSM_PARAMETER_ERRORS:
+                # Best effort, same as a parameter that can't be loaded
+                return {}
+
+            # One bad parameter (e.g. access denied) fails the whole batch, so fall back to fetching one by one to
+            # keep loading the others on a best effort basis.
+            return self._get_ssm_parameters_individually(client, names)
+
+        for invalid_name in response.get("InvalidParameters", []):
+            logger.error(f"Could not load SSM parameter: {invalid_name}")
+
+        return {param["Name"]: param["Value"] for param in response.get("Parameters", [])}
+
+    def _get_ssm_parameters_individually(self, client, names: List[str]) -> Dict[str, str]:
+        from botocore.exceptions import ClientError
+
+        values = {}
+
+        for name in names:
             try:
-                param = self._ssm.get_parameter(
-                    Name=value.replace("ssm:", ""),
-                    WithDecryption=True
-                )
+                param = client.get_parameter(Name=name, WithDecryption=True)
 
                 if param.get("Parameter"):
-                    self.set_attr(name, param["Parameter"]["Value"], parent)
+                    values[name] = param["Parameter"]["Value"]
             except ClientError as e:
                 # Best effort to load parameter
                 logger.error(e)
-        else:
-            self.set_attr(name, value, parent)
+
+        return values
 
     def set_attr(self, name: str, value: Any, parent: str = None):
+        # A value set after an `ssm:` reference for the same key takes precedence, same as any other override.
+        self._ssm_refs.pop((parent, name), None)
+
         if type(value) in self.TOML_TO_BUILTIN_MAP:
             value = self.TOML_TO_BUILTIN_MAP[type(value)](value)
 
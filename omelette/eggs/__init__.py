@@ -1,7 +1,39 @@
-from .snowflake import Snowflake
-from .s3 import S3
-from .sftp import Sftp
-from .sftp_s3_interface import SftpS3Interface
-from .slack import Slack
-from .files import Files
-from .kafka import Kafka, KafkaMessageSpecEnum
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .snowflake import Snowflake
+    from .s3 import S3
+    from .sftp import Sftp
+    from .sftp_s3_interface import SftpS3Interface
+    from .slack import Slack
+    from .files import Files
+    from .kafka import Kafka, KafkaMessageSpecEnum
+
+# Eggs are resolved on first attribute access (PEP 562) so recipes only import the third-party libraries for the
+# connectors they actually use, e.g. `from omelette.eggs import S3` does not import snowflake-connector or paramiko.
+_EGGS = {
+    "Snowflake": ".snowflake",
+    "S3": ".s3",
+    "Sftp": ".sftp",
+    "SftpS3Interface": ".sftp_s3_interface",
+    "Slack": ".slack",
+    "Files": ".files",
+    "Kafka": ".kafka",
+    "KafkaMessageSpecEnum": ".kafka",
+}
+
+__all__ = list(_EGGS)
+
+
+def __getattr__(name):
+    if name not in _EGGS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(import_module(_EGGS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
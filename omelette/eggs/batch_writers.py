@@ -0,0 +1,143 @@
+import csv
+import gzip
+import io
+import json
+import os
+from contextlib import contextmanager
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, BinaryIO, Iterator, List, Optional, TextIO
+
+
+def open_compressed(raw: BinaryIO, compression: Optional[str] = None) -> BinaryIO:
+    """Wrap binary file `raw` in a streaming compressor. Supports gzip, and zstd if `zstandard` is installed."""
+    if not compression:
+        return raw
+    elif compression.lower() == "gzip":
+        return gzip.GzipFile(fileobj=raw, mode="wb")
+    elif compression.lower() == "zstd":
+        import zstandard
+
+        return zstandard.ZstdCompressor().stream_writer(raw)
+
+    raise ValueError(f"Invalid compression: {compression}. Expected 'gzip' or 'zstd'.")
+
+
+@contextmanager
+def open_text(path: str, compression: Optional[str] = None) -> Iterator[TextIO]:
+    """Open `path` for writing text, optionally compressed. GzipFile doesn't close the file it wraps, so the file is
+    closed separately, after the compressor has flushed into it."""
+    with open(path, "wb") as raw, io.TextIOWrapper(open_compressed(raw, compression), encoding="utf-8",
+                                                    newline="") as f:
+        yield f
+
+
+def get_part_file_name(file_name: str, part: int) -> str:
+    """Insert part number before the extension(s), e.g. export.csv.gz -> export_0001.csv.gz"""
+    directory, base = os.path.split(file_name)
+    stem, dot, extension = base.partition(".")
+    return os.path.join(directory, f"{stem}_{part:04d}{dot}{extension}")
+
+
+class BatchWriter:
+    """Writes batches of rows (pyarrow Tables) to a file as they arrive, so only one batch needs to be in memory.
+    `size` is the number of (compressed) bytes written to disk so far, used for rolling over to a new file."""
+
+    def __init__(self, path: str, columns: List[str], compression: Optional[str] = None):
+        self.path = path
+        self.columns = columns
+        self.compression = compression
+        self._raw = open(path, "wb")
+
+    @property
+    def size(self) -> int:
+        return self._raw.tell()
+
+    def write(self, table):
+        raise NotImplementedError
+
+    def close(self):
+        self._raw.close()
+
+
+class CsvBatchWriter(BatchWriter):
+    def __init__(self, path: str, columns: List[str], compression: Optional[str] = None, delimiter: str = ","):
+        super().__init__(path, columns, compression)
+        self.delimiter = delimiter
+        self._f = io.TextIOWrapper(open_compressed(self._raw, compression), encoding="utf-8", newline="")
+        csv.writer(self._f, delimiter=delimiter, lineterminator="\n").writerow(columns)
+
+    def write(self, table):
+        # Keep integer columns with nulls as integers, pandas would otherwise turn them into floats (1 -> 1.0)
+        table.to_pandas(integer_object_nulls=True).to_csv(self._f, sep=self.delimiter, header=False, index=False)
+
+    def close(self):
+        self._f.close()
+        super().close()
+
+
+def _json_default(value: Any):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    elif isinstance(value, Decimal):
+        # Strings keep the exact value, floats lose precision beyond ~15 significant digits
+        return str(value)
+    elif isinstance(value, bytes):
+        return value.hex()
+
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class NdjsonBatchWriter(BatchWriter):
+    def __init__(self, path: str, columns: List[str], compression: Optional[str] = None):
+        super().__init__(path, columns, compression)
+        self._f = io.TextIOWrapper(open_compressed(self._raw, compression), encoding="utf-8", newline="")
+
+    def write(self, table):
+        # Rows as Python values rather than through pandas, which would turn integer columns with nulls into floats
+        self._f.writelines(json.dumps(row, default=_json_default) + "\n" for row in table.to_pylist())
+
+    def close(self):
+        self._f.close()
+        super().close()
+
+
+class ParquetBatchWriter(BatchWriter):
+    """Parquet compresses each column chunk itself, so `compression` is passed to the Parquet writer (default snappy)
+    instead of wrapping the file. `row_group_size` caps the number of rows per row group."""
+
+    def __init__(self, path: str, columns: List[str], compression: Optional[str] = None,
+                 row_group_size: Optional[int] = None):
+        super().__init__(path, columns, compression)
+        self.row_group_size = row_group_size
+        self._writer = None
+
+    def write(self, table):
+        import pyarrow.parquet as pq
+
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self._raw, table.schema, compression=self.compression or "snappy")
+        elif table.schema != self._writer.schema:
+            # e.g. a column that was all null in the first batch
+            table = table.cast(self._writer.schema)
+
+        self._writer.write_table(table, row_group_size=self.row_group_size)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        super().close()
+
+
+def get_batch_writer(file_format: str, path: str, columns: List[str], compression: Optional[str] = None,
+                     delimiter: str = ",", row_group_size: Optional[int] = None) -> BatchWriter:
+    file_format = file_format.upper()
+
+    if file_format == "CSV":
+        return CsvBatchWriter(path, columns, compression, delimiter)
+    elif file_format in {"JSON", "NDJSON"}:
+        return NdjsonBatchWriter(path, columns, compression)
+    elif file_format == "PARQUET":
+        return ParquetBatchWriter(path, columns, compression, row_group_size)
+
+    raise ValueError(f"Invalid file format: {file_format}. Expected 'CSV', 'JSON', 'NDJSON' or 'PARQUET'.")
@@ -1,8 +1,25 @@
+import copy
+import hashlib
 import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+
+from omelette.core.retry import RetryPolicy
 
 logger = logging.getLogger(__name__)
 
+MB = 1024 ** 2
+
 
 class S3DownloadError(Exception):
     pass
@@ -12,48 +29,479 @@ class S3UploadError(Exception):
     pass
 
 
+class TransferProgress:
+    """Callback for boto3 transfers that tracks bytes transferred and throughput. Logs progress at most every
+    `log_interval` seconds, and calls `callback(bytes_transferred, total_bytes, bytes_per_second)` on every update if
+    given. Thread safe, since boto3 calls it from each transfer thread."""
+
+    def __init__(self, name: str, total_bytes: Optional[int] = None, log_interval: float = 10,
+                 callback: Optional[Callable[[int, Optional[int], float], None]] = None):
+        self.name = name
+        self.total_bytes = total_bytes
+        self.log_interval = log_interval
+        self.callback = callback
+        self.bytes_transferred = 0
+        self.start_time = time.monotonic()
+        self._last_log_time = self.start_time
+        self._lock = threading.Lock()
+
+    @property
+    def bytes_per_second(self) -> float:
+        elapsed = time.monotonic() - self.start_time
+        return self.bytes_transferred / elapsed if elapsed else 0.0
+
+    def __call__(self, bytes_amount: int):
+        with self._lock:
+            self.bytes_transferred += bytes_amount
+            now = time.monotonic()
+
+            if now - self._last_log_time >= self.log_interval:
+                self._last_log_time = now
+                self.log()
+
+        if self.callback:
+            self.callback(self.bytes_transferred, self.total_bytes, self.bytes_per_second)
+
+    def log(self):
+        percent = f" ({100 * self.bytes_transferred / self.total_bytes:.1f}%)" if self.total_bytes else ""
+        logger.info(f"{self.name}: {self.bytes_transferred / MB:.1f} MB{percent} transferred, "
+                    f"{self.bytes_per_second / MB:.2f} MB/s.")
+
+
 class S3:
-    """Wrapper around boto3 S3 client. Provides more robust retry logic."""
+    """Wrapper around boto3 S3 client. Provides more robust retry logic. Pass a `RetryPolicy` to back off between
+    attempts, otherwise failed transfers are retried immediately up to `retry_count` times.
 
-    def __init__(self):
-        self.client = boto3.client("s3")
+    Pass a `TransferConfig`, e.g. from `S3.get_transfer_config`, to tune multipart size, concurrency and bandwidth
+    of uploads and downloads."""
 
-    def download_file(self, bucket: str, key: str, download_path: str, retry_count: int = 3) -> str:
-        """Downloads existing file from S3."""
-        retries = retry_count
+    def __init__(self, retry_policy: Optional[RetryPolicy] = None, transfer_config: Optional[TransferConfig] = None):
+        self.transfer_config = transfer_config or TransferConfig()
+        # Enough pooled HTTP connections for every concurrent part, boto3's default is 10.
+        self.max_pool_connections = max(10, self.transfer_config.max_request_concurrency)
+        self.client = boto3.client("s3", config=Config(max_pool_connections=self.max_pool_connections))
+        self.retry_policy = retry_policy
 
-        logger.info(f"Downloading file: {bucket}/{key} to {download_path}.")
+    @staticmethod
+    def get_transfer_config(part_size: int = 8 * MB, max_concurrency: int = 10, multipart_threshold: int = 8 * MB,
+                            max_bandwidth: Optional[int] = None) -> TransferConfig:
+        """Transfer profile: part size and multipart threshold in bytes, number of parts transferred concurrently,
+        and optional bandwidth cap in bytes per second."""
+        return TransferConfig(multipart_chunksize=part_size, max_concurrency=max_concurrency,
+                              multipart_threshold=multipart_threshold, max_bandwidth=max_bandwidth)
 
-        while retries > 0:
-            try:
-                self.client.download_file(bucket, key, download_path)
-                logger.info(f"File download from {bucket}/{key} complete: {download_path}.")
-                break
-            except Exception as e:
-                retries -= 1
-                logger.exception(f"Error downloading file {key} from s3.")
+    def _get_retry_policy(self, retry_count: int) -> RetryPolicy:
+        return self.retry_policy or RetryPolicy(max_attempts=retry_count)
+
+    def download_file(self, bucket: str, key: str, download_path: str, retry_count: int = 3,
+                      progress_callback: Optional[Callable[[int, Optional[int], float], None]] = None) -> str:
+        """Downloads existing file from S3."""
+        logger.info(f"Downloading file: {bucket}/{key} to {download_path}.")
+        progress = TransferProgress(f"Download {bucket}/{key}", callback=progress_callback)
 
-                if retries == 0:
-                    raise S3DownloadError(e)
+        try:
+            self._get_retry_policy(retry_count).call(self.client.download_file, bucket, key, download_path,
+                                                     Config=self.transfer_config, Callback=progress)
+        except Exception as e:
+            logger.exception(f"Error downloading file {key} from s3.")
+            raise S3DownloadError(e)
 
-        logger.info("S3 download complete.")
+        progress.log()
+        logger.info(f"File download from {bucket}/{key} complete: {download_path}.")
 
         return download_path
 
-    def upload_file(self, file_name: str, bucket: str, key: str, retry_count: int = 3):
+    def upload_file(self, file_name: str, bucket: str, key: str, retry_count: int = 3,
+                    progress_callback: Optional[Callable[[int, Optional[int], float], None]] = None):
         """Helper function to upload files to S3 with basic retry logic."""
-        retries = retry_count
-
         logger.info(f"Uploading file: {file_name} to {bucket}/{key}.")
+        progress = TransferProgress(f"Upload {file_name}", os.path.getsize(file_name), callback=progress_callback)
+
+        try:
+            self._get_retry_policy(retry_count).call(self.client.upload_file, file_name, bucket, key,
+                                                     Config=self.transfer_config, Callback=progress)
+        except Exception as e:
+            logger.exception(f"Error uploading file {file_name} to {bucket}/{key}")
+            raise S3UploadError(e)
+
+        progress.log()
+        logger.info(f"File upload complete: {file_name} to {bucket}/{key}.")
+
+    def upload_file_resumable(self, file_name: str, bucket: str, key: str, retry_count: int = 3,
+                              progress_callback: Optional[Callable[[int, Optional[int], float], None]] = None):
+        """Upload a large file with a multipart upload that can be resumed. If an earlier attempt for the same key
+        left an unfinished multipart upload, parts it already completed are kept and only the rest are uploaded. An
+        upload is only resumed if every completed part has the size and MD5 (ETag) of the same byte range of the local
+        file; otherwise it was for a different file, or a different version of it, and is aborted and started over.
+        Parts are uploaded concurrently and each is retried on its own. On failure, the multipart upload is left open
+        so calling this again picks up where it stopped. The source file's size and mtime are stored in the object's
+        metadata (source-size, source-mtime)."""
+        file_size = os.path.getsize(file_name)
+        # S3 allows at most 10,000 parts per upload
+        part_size = max(self.transfer_config.multipart_chunksize, -(-file_size // 10_000))
+        part_count = max(1, -(-file_size // part_size))
+        policy = self._get_retry_policy(retry_count)
+        progress = TransferProgress(f"Upload {file_name}", file_size, callback=progress_callback)
+
+        logger.info(f"Uploading file: {file_name} to {bucket}/{key} in {part_count} parts.")
+
+        try:
+            upload_id = self._find_multipart_upload(bucket, key)
+            completed = self._list_completed_parts(bucket, key, upload_id) if upload_id else {}
+
+            if upload_id and not self._parts_match_file(file_name, file_size, part_size, completed):
+                logger.info(f"Multipart upload {upload_id} doesn't match {file_name}, aborting it and starting over.")
+                self.client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+                upload_id, completed = None, {}
+
+            if upload_id:
+                logger.info(f"Resuming multipart upload {upload_id}, {len(completed)} of {part_count} parts done.")
+            else:
+                metadata = {"source-size": str(file_size), "source-mtime": str(os.path.getmtime(file_name))}
+                upload_id = self.client.create_multipart_upload(Bucket=bucket, Key=key, Metadata=metadata)["UploadId"]
+
+            def upload_part(part_number: int) -> Dict[str, str]:
+                offset, length = self._get_part_range(part_number, part_size, file_size)
+
+                if part_number in completed:
+                    progress(length)
+                    return {"PartNumber": part_number, "ETag": completed[part_number]["ETag"]}
+
+                body = self._read_range(file_name, offset, length)
+
+                response = policy.call(self.client.upload_part, Bucket=bucket, Key=key, UploadId=upload_id,
+                                       PartNumber=part_number, Body=body)
+                progress(length)
+                return {"PartNumber": part_number, "ETag": response["ETag"]}
+
+            with ThreadPoolExecutor(max_workers=self.transfer_config.max_request_concurrency) as executor:
+                parts = list(executor.map(upload_part, range(1, part_count + 1)))
+
+            self.client.complete_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id,
+                                                  MultipartUpload={"Parts": parts})
+        except Exception as e:
+            logger.exception(f"Error uploading file {file_name} to {bucket}/{key}")
+            raise S3UploadError(e)
+
+        progress.log()
+        logger.info(f"File upload complete: {file_name} to {bucket}/{key}.")
+
+    def upload_stream(self, parts: Iterable[bytes], bucket: str, key: str, max_parts_in_flight: Optional[int] = None,
+                      retry_count: int = 3, total_bytes: Optional[int] = None,
+                      progress_callback: Optional[Callable[[int, Optional[int], float], None]] = None
+                      ) -> Dict[str, Any]:
+        """Upload an object from an iterable of parts (bytes) with a multipart upload, without a local file. Parts are
+        uploaded concurrently while the next ones are produced, and the iterable is only advanced when fewer than
+        `max_parts_in_flight` parts (default the transfer config's concurrency) are waiting, so memory stays bounded
+        to a few parts. Every part except the last must be at least 5 MB. On failure, the multipart upload is aborted.
+        Returns a summary with bytes, parts and timing."""
+        t1 = time.monotonic()
+        max_parts_in_flight = max_parts_in_flight or self.transfer_config.max_request_concurrency
+        policy = self._get_retry_policy(retry_count)
+        progress = TransferProgress(f"Upload {bucket}/{key}", total_bytes, callback=progress_callback)
+        slots = threading.BoundedSemaphore(max_parts_in_flight)
+        failed = threading.Event()
+
+        logger.info(f"Streaming upload to {bucket}/{key} with up to {max_parts_in_flight} parts in flight.")
+        upload_id = self.client.create_multipart_upload(Bucket=bucket, Key=key)["UploadId"]
+
+        def upload_part(part_number: int, body: bytes) -> Dict[str, Any]:
+            try:
+                response = policy.call(self.client.upload_part, Bucket=bucket, Key=key, UploadId=upload_id,
+                                       PartNumber=part_number, Body=body)
+                progress(len(body))
+                return {"PartNumber": part_number, "ETag": response["ETag"]}
+            except Exception:
+                failed.set()
+                raise
+            finally:
+                slots.release()
+
+        try:
+            with ThreadPoolExecutor(max_workers=max_parts_in_flight) as executor:
+                futures = []
+
+                for part_number, body in enumerate(parts, start=1):
+                    slots.acquire()
+
+                    # No point reading the rest of the stream once a part has failed
+                    if failed.is_set():
+                        break
+
+                    futures.append(executor.submit(upload_part, part_number, body))
+
+                uploaded = [f.result() for f in futures]
+
+            if uploaded:
+                self.client.complete_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id,
+                                                      MultipartUpload={"Parts": uploaded})
+            else:
+                self.client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+                self.client.put_object(Bucket=bucket, Key=key, Body=b"")
+        except Exception as e:
+            logger.exception(f"Error streaming upload to {bucket}/{key}")
+            self.client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+            raise S3UploadError(e)
+
+        progress.log()
+        seconds = time.monotonic() - t1
+        summary = {"bytes": progress.bytes_transferred, "parts": len(uploaded), "seconds": seconds,
+                   "bytes_per_second": progress.bytes_transferred / seconds if seconds else 0.0}
+        logger.info(f"Streaming upload to {bucket}/{key} complete. Took {seconds:.2f} seconds "
+                    f"({summary['bytes_per_second'] / MB:.2f} MB/s).")
+        return summary
+
+    def download_stream(self, bucket: str, key: str, part_size: Optional[int] = None, parts_ahead: int = 2,
+                        retry_count: int = 3,
+                        progress_callback: Optional[Callable[[int, Optional[int], float], None]] = None
+                        ) -> Iterator[bytes]:
+        """Iterate over an object's contents in parts of `part_size` (default the transfer config's part size),
+        without a local file. Each part is a ranged GET, retried on its own, and up to `parts_ahead` parts are fetched
+        concurrently ahead of the one being consumed, so memory stays bounded to a few parts. The object is looked up
+        right away, so a missing object raises here rather than on the first part."""
+        size = self.client.head_object(Bucket=bucket, Key=key)["ContentLength"]
+        progress = TransferProgress(f"Download {bucket}/{key}", size, callback=progress_callback)
+
+        return self._iter_parts(bucket, key, size, part_size or self.transfer_config.multipart_chunksize, parts_ahead,
+                                self._get_retry_policy(retry_count), progress)
+
+    def _iter_parts(self, bucket: str, key: str, size: int, part_size: int, parts_ahead: int, policy: RetryPolicy,
+                    progress: TransferProgress) -> Iterator[bytes]:
+        def get_part(offset: int) -> bytes:
+            end = min(offset + part_size, size) - 1
+            return self.client.get_object(Bucket=bucket, Key=key, Range=f"bytes={offset}-{end}")["Body"].read()
+
+        offsets = iter(range(0, size, part_size))
+        executor = ThreadPoolExecutor(max_workers=parts_ahead)
+        futures = deque(executor.submit(policy.call, get_part, offset) for offset in islice(offsets, parts_ahead))
+
+        try:
+            while futures:
+                part = futures.popleft().result()
 
-        while retries > 0:
+                for offset in islice(offsets, 1):
+                    futures.append(executor.submit(policy.call, get_part, offset))
+
+                progress(len(part))
+                yield part
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown()
+
+        if progress.bytes_transferred != size:
+            raise S3DownloadError(f"Read {progress.bytes_transferred} bytes of {bucket}/{key}, expected {size}.")
+
+        progress.log()
+
+    def download_prefix(self, bucket: str, prefix: str, download_dir: str, max_workers: int = 8,
+                        filter_func: Optional[Callable[[str], bool]] = None, retry_count: int = 3) -> Dict[str, Any]:
+        """Download every object under `prefix` (for which `filter_func(key)` is true, if given) into `download_dir`,
+        keeping the key's path relative to the prefix. `prefix` is a "directory", e.g. "exports" means "exports/".
+        Objects are listed page by page and downloaded concurrently on `max_workers` threads sharing this client.
+        Local files matching the object's size and ETag are skipped. Keys whose path would end up outside
+        `download_dir` (e.g. with `..` segments) aren't downloaded and count as failed. Returns a summary with files
+        transferred/skipped, bytes and timing."""
+        # Otherwise "exports/2026" would also match "exports/2026-old/..."
+        if prefix and not prefix.endswith("/"):
+            prefix += "/"
+
+        logger.info(f"Downloading s3://{bucket}/{prefix} to {download_dir} with {max_workers} workers.")
+        config = self._get_batch_transfer_config(max_workers)
+
+        def reject(error: Exception):
+            raise error
+
+        def get_tasks():
+            for page in self.client.get_paginator("list_objects_v2").paginate(Bucket=bucket, Prefix=prefix):
+                for obj in page.get("Contents", []):
+                    key = obj["Key"]
+
+                    if key.endswith("/") or (filter_func and not filter_func(key)):
+                        continue
+
+                    try:
+                        path = self._get_download_path(download_dir, prefix, key)
+                    except S3DownloadError as e:
+                        yield key, partial(reject, e), 0
+                        continue
+
+                    if self._is_same_file(path, obj["Size"], obj["ETag"]):
+                        yield key, None, obj["Size"]
+                    else:
+                        yield key, partial(self._download_object, bucket, key, path, config, retry_count), obj["Size"]
+
+        summary = self._run_transfers(get_tasks(), max_workers)
+
+        if summary["failed"]:
+            raise S3DownloadError(f"Failed to download {len(summary['failed'])} objects: {summary['failed']}")
+
+        return summary
+
+    def upload_directory(self, directory: str, bucket: str, prefix: str = "", max_workers: int = 8,
+                         filter_func: Optional[Callable[[str], bool]] = None, retry_count: int = 3) -> Dict[str, Any]:
+        """Upload every file under `directory` (for which `filter_func(path)` is true, if given) to `prefix`, keeping
+        paths relative to the directory. Files are uploaded concurrently on `max_workers` threads sharing this client.
+        Files whose object already exists with the same size and ETag are skipped. Returns a summary with files
+        transferred/skipped, bytes and timing."""
+        logger.info(f"Uploading {directory} to s3://{bucket}/{prefix} with {max_workers} workers.")
+        config = self._get_batch_transfer_config(max_workers)
+        existing = {}
+
+        for page in self.client.get_paginator("list_objects_v2").paginate(Bucket=bucket, Prefix=prefix):
+            existing.update({obj["Key"]: obj for obj in page.get("Contents", [])})
+
+        def get_tasks():
+            for root, _, files in os.walk(directory):
+                for name in sorted(files):
+                    path = os.path.join(root, name)
+
+                    if filter_func and not filter_func(path):
+                        continue
+
+                    relative_key = os.path.relpath(path, directory).replace(os.sep, "/")
+                    key = f"{prefix.rstrip('/')}/{relative_key}" if prefix else relative_key
+                    size = os.path.getsize(path)
+                    obj = existing.get(key)
+
+                    if obj and self._is_same_file(path, obj["Size"], obj["ETag"]):
+                        yield path, None, size
+                    else:
+                        yield path, partial(self._upload_object, path, bucket, key, config, retry_count), size
+
+        summary = self._run_transfers(get_tasks(), max_workers)
+
+        if summary["failed"]:
+            raise S3UploadError(f"Failed to upload {len(summary['failed'])} files: {summary['failed']}")
+
+        return summary
+
+    def _download_object(self, bucket: str, key: str, path: str, config: TransferConfig, retry_count: int):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._get_retry_policy(retry_count).call(self.client.download_file, bucket, key, path, Config=config)
+
+    def _upload_object(self, path: str, bucket: str, key: str, config: TransferConfig, retry_count: int):
+        self._get_retry_policy(retry_count).call(self.client.upload_file, path, bucket, key, Config=config)
+
+    def _get_batch_transfer_config(self, max_workers: int) -> TransferConfig:
+        """Transfer config for `max_workers` files transferred at once, with each file's concurrency lowered so that
+        `max_workers` * per-file concurrency doesn't exceed the client's `max_pool_connections`."""
+        if max_workers > self.max_pool_connections:
+            logger.warning(f"{max_workers} workers share {self.max_pool_connections} pooled connections, workers "
+                           f"will wait for connections. Raise max_concurrency in the TransferConfig to add more.")
+
+        config = copy.copy(self.transfer_config)
+        config.max_concurrency = min(config.max_request_concurrency, max(1, self.max_pool_connections // max_workers))
+        return config
+
+    @staticmethod
+    def _run_transfers(tasks: Iterator[Tuple[str, Optional[Callable[[], None]], int]],
+                       max_workers: int) -> Dict[str, Any]:
+        """Run (name, transfer, size) tasks on a thread pool, with at most 2 * `max_workers` queued at a time so
+        listings are consumed lazily. A transfer of None is a skipped file."""
+        t1 = time.monotonic()
+        summary = {"transferred": 0, "skipped": 0, "bytes": 0, "failed": []}
+        slots = threading.BoundedSemaphore(2 * max_workers)
+        lock = threading.Lock()
+
+        def run(name: str, transfer: Callable[[], None], size: int):
             try:
-                self.client.upload_file(file_name, bucket, key)
-                logger.info(f"File upload complete: {file_name} to {bucket}/{key}.")
-                break
+                transfer()
+                with lock:
+                    summary["transferred"] += 1
+                    summary["bytes"] += size
+                logger.debug(f"Transferred {name}")
             except Exception as e:
-                retries -= 1
-                logger.exception(f"Error uploading file {file_name} to {bucket}/{key}")
+                logger.error(f"Error transferring {name}: {e}")
+                with lock:
+                    summary["failed"].append(name)
+            finally:
+                slots.release()
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for name, transfer, size in tasks:
+                if transfer is None:
+                    summary["skipped"] += 1
+                    continue
+
+                slots.acquire()
+                executor.submit(run, name, transfer, size)
+
+        summary["seconds"] = time.monotonic() - t1
+        summary["bytes_per_second"] = summary["bytes"] / summary["seconds"] if summary["seconds"] else 0.0
+        logger.info(f"Transferred {summary['transferred']} files ({summary['bytes'] / MB:.1f} MB), skipped "
+                    f"{summary['skipped']}, failed {len(summary['failed'])} in {summary['seconds']:.2f} seconds "
+                    f"({summary['bytes_per_second'] / MB:.2f} MB/s).")
+        return summary
+
+    @staticmethod
+    def _get_download_path(download_dir: str, prefix: str, key: str) -> str:
+        """Local path of `key` relative to `prefix` under `download_dir`. Raises S3DownloadError if it would be outside
+        `download_dir`."""
+        relative_key = key[len(prefix):].lstrip("/")
+        root = os.path.abspath(download_dir)
+        path = os.path.abspath(os.path.join(root, *relative_key.split("/")))
+
+        if path == root or os.path.commonpath([root, path]) != root:
+            raise S3DownloadError(f"Not downloading {key}: its path is outside of {download_dir}.")
+        return path
+
+    @staticmethod
+    def _is_same_file(path: str, size: int, etag: str) -> bool:
+        """Local file matches an object's size and, unless it was a multipart upload (ETag isn't an MD5), its ETag."""
+        if not os.path.isfile(path) or os.path.getsize(path) != size:
+            return False
+
+        etag = etag.strip('"')
+
+        if "-" in etag:
+            return True
+
+        md5 = hashlib.md5()
+
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(MB), b""):
+                md5.update(chunk)
+
+        return md5.hexdigest() == etag
+
+    def _find_multipart_upload(self, bucket: str, key: str) -> Optional[str]:
+        """Most recent unfinished multipart upload for `key`, if any."""
+        uploads = []
+
+        for page in self.client.get_paginator("list_multipart_uploads").paginate(Bucket=bucket, Prefix=key):
+            uploads.extend(u for u in page.get("Uploads", []) if u["Key"] == key)
+
+        return max(uploads, key=lambda u: u["Initiated"])["UploadId"] if uploads else None
+
+    @staticmethod
+    def _get_part_range(part_number: int, part_size: int, file_size: int) -> Tuple[int, int]:
+        offset = (part_number - 1) * part_size
+        return offset, min(part_size, file_size - offset)
+
+    @staticmethod
+    def _read_range(file_name: str, offset: int, length: int) -> bytes:
+        with open(file_name, "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def _parts_match_file(self, file_name: str, file_size: int, part_size: int, parts: Dict[int, Dict]) -> bool:
+        """Each uploaded part has the size and MD5 of the same byte range of the local file. Part ETags are the MD5 of
+        their content, except with SSE-KMS or SSE-C encryption, where such uploads are never resumed."""
+        for part_number, part in parts.items():
+            offset, length = self._get_part_range(part_number, part_size, file_size)
+
+            if length <= 0 or part["Size"] != length:
+                return False
+            if hashlib.md5(self._read_range(file_name, offset, length)).hexdigest() != part["ETag"].strip('"'):
+                return False
+
+        return True
+
+    def _list_completed_parts(self, bucket: str, key: str, upload_id: str) -> Dict[int, Dict]:
+        parts: List[Dict] = []
+
+        for page in self.client.get_paginator("list_parts").paginate(Bucket=bucket, Key=key, UploadId=upload_id):
+            parts.extend(page.get("Parts", []))
 
-                if retries == 0:
-                    raise S3UploadError(e)
+        return {p["PartNumber"]: p for p in parts}
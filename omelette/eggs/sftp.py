@@ -1,18 +1,63 @@
 import logging
 import os
+import threading
+import time
+import weakref
 from base64 import decodebytes
+from concurrent.futures import ThreadPoolExecutor
 from io import StringIO
-from typing import Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
+import paramiko
 import pysftp
 
 logger = logging.getLogger(__name__)
 
+MB = 1024 ** 2
+# Largest SFTP read request paramiko sends. readv over blocks of this size avoids paramiko's quadratic buffering of
+# large single reads.
+READ_BLOCK_SIZE = 32 * 1024
+
+
+class SftpTransferError(Exception):
+    pass
+
+
+def read_range(f: paramiko.SFTPFile, offset: int, length: int) -> Iterator[bytes]:
+    """Read `length` bytes of remote file `f` from `offset` in blocks of READ_BLOCK_SIZE, with every read request
+    sent before waiting for the responses.
+
+    paramiko's readv sends the requests from a background thread, and marks the prefetch done as soon as the responses
+    catch up with the requests sent so far. The remaining blocks are then read one request (and round trip) at a time,
+    which happens easily on fast links while other threads, e.g. uploads, hold the GIL. So send them all from this
+    thread first. This relies on paramiko internals (see the pinned range in pyproject.toml), and falls back to plain
+    readv if they change."""
+    blocks = [(o, min(READ_BLOCK_SIZE, offset + length - o)) for o in range(offset, offset + length, READ_BLOCK_SIZE)]
+
+    if not all(hasattr(f, name) for name in ("_start_prefetch", "_prefetch_thread", "_prefetching", "_prefetch_done")):
+        yield from f.readv(blocks)
+        return
+
+    def start_prefetch(chunks, *args):
+        f._prefetching, f._prefetch_done = True, False
+        f._prefetch_thread(chunks, *args)
+
+    # Only for this readv, later reads of the handle use paramiko's own prefetch again
+    f._start_prefetch = start_prefetch
+
+    try:
+        yield from f.readv(blocks)
+    finally:
+        del f._start_prefetch
+
 
 class Sftp(pysftp.Connection):
     """Wrapper of pysftp.Connection. Handles proper parsing of private keys and host fingerprints, and also
     adds additional options for paramiko connection args."""
 
+    # Set on connections owned by an `SftpPool`, which tracks the channels opened over them
+    _pool: Optional["SftpPool"] = None
+
     def __init__(self, *, host: str, port: int = 22, username: str, password: Optional[str] = None,
                  private_key: Optional[str] = None, passphrase: Optional[str] = None,
                  host_fingerprint: Optional[str] = None, auth_timeout: Optional[int] = None, **kwargs):
@@ -49,3 +94,279 @@ class Sftp(pysftp.Connection):
         self._transport.connect(**self._tconnect)
 
         logger.info("Connected to sftp.")
+
+    @classmethod
+    def pooled(cls, *, host: str, port: int = 22, username: str, **kwargs) -> "Sftp":
+        """Shared connection for this host, port and username from the process-wide `SftpPool`. Reuses the SSH
+        transport across steps and warm Lambda invocations instead of connecting again. Don't close it, and use
+        `open_channel` for concurrent transfers."""
+        return SftpPool.get_pool(dict(host=host, port=port, username=username, **kwargs)).connection()
+
+    def open_channel(self) -> paramiko.SFTPClient:
+        """Open another SFTP channel over this connection's SSH transport. Channels are independent, so each thread
+        can use its own without a new handshake. Close it when done; on a pooled connection, the connection isn't
+        considered idle (or closed by the pool) while it has open channels."""
+        channel = paramiko.SFTPClient.from_transport(self._transport)
+
+        if self._pool:
+            self._pool._lease(channel)
+        return channel
+
+    def get_parallel(self, remotepath: str, localpath: str, chunk_size: int = 32 * MB, workers: int = 4
+                     ) -> Dict[str, Any]:
+        """Download a large file as disjoint byte ranges of `chunk_size`, read concurrently by `workers` threads, each
+        over its own SFTP channel with pipelined (prefetched) reads. Ranges are written at their offsets into a local
+        file preallocated to the remote size, and the bytes received are checked against it at the end. Returns a
+        summary with bytes and timing."""
+        file_size = self.stat(remotepath).st_size
+        logger.info(f"Downloading {remotepath} ({file_size / MB:.1f} MB) to {localpath} with {workers} workers.")
+
+        with open(localpath, "wb") as f:
+            f.truncate(file_size)
+
+        def get_chunk(channel: paramiko.SFTPClient, offset: int, length: int) -> int:
+            received = 0
+
+            with channel.open(remotepath, "rb") as remote, open(localpath, "r+b") as local:
+                local.seek(offset)
+
+                for block in read_range(remote, offset, length):
+                    local.write(block)
+                    received += len(block)
+
+            return received
+
+        summary = self._run_chunks(get_chunk, file_size, chunk_size, workers)
+
+        if summary["bytes"] != file_size or os.path.getsize(localpath) != file_size:
+            raise SftpTransferError(f"Received {summary['bytes']} bytes of {remotepath}, expected {file_size}.")
+
+        return summary
+
+    def put_parallel(self, localpath: str, remotepath: str, chunk_size: int = 32 * MB, workers: int = 4
+                     ) -> Dict[str, Any]:
+        """Upload a large file as disjoint byte ranges of `chunk_size`, written concurrently by `workers` threads, each
+        over its own SFTP channel with pipelined writes at the range's offset in the remote file. The remote file size
+        is checked at the end. Returns a summary with bytes and timing."""
+        file_size = os.path.getsize(localpath)
+        logger.info(f"Uploading {localpath} ({file_size / MB:.1f} MB) to {remotepath} with {workers} workers.")
+
+        with self.open(remotepath, "wb") as remote:
+            remote.truncate(file_size)
+
+        def put_chunk(channel: paramiko.SFTPClient, offset: int, length: int) -> int:
+            sent = 0
+
+            with open(localpath, "rb") as local, channel.open(remotepath, "r+b") as remote:
+                local.seek(offset)
+                remote.seek(offset)
+                # Don't wait for the server to acknowledge each write before sending the next one
+                remote.set_pipelined(True)
+
+                while sent < length:
+                    block = local.read(min(MB, length - sent))
+
+                    if not block:
+                        break
+
+                    remote.write(block)
+                    sent += len(block)
+
+            return sent
+
+        summary = self._run_chunks(put_chunk, file_size, chunk_size, workers)
+        remote_size = self.stat(remotepath).st_size
+
+        if summary["bytes"] != file_size or remote_size != file_size:
+            raise SftpTransferError(f"Remote file {remotepath} is {remote_size} bytes, expected {file_size}.")
+
+        return summary
+
+    def _run_chunks(self, transfer_chunk: Callable[[paramiko.SFTPClient, int, int], int], file_size: int,
+                    chunk_size: int, workers: int) -> Dict[str, Any]:
+        """Call `transfer_chunk(channel, offset, length)` for each range of the file on `workers` threads, each with
+        its own SFTP channel. Returns the total bytes transferred and timing."""
+        t1 = time.monotonic()
+        channels: List[paramiko.SFTPClient] = []
+        local = threading.local()
+        lock = threading.Lock()
+
+        def run(offset: int) -> int:
+            if not hasattr(local, "channel"):
+                local.channel = self.open_channel()
+                with lock:
+                    channels.append(local.channel)
+
+            return transfer_chunk(local.channel, offset, min(chunk_size, file_size - offset))
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                transferred = sum(executor.map(run, range(0, file_size, chunk_size)))
+        finally:
+            for channel in channels:
+                channel.close()
+
+        seconds = time.monotonic() - t1
+        summary = {"bytes": transferred, "seconds": seconds,
+                   "bytes_per_second": transferred / seconds if seconds else 0.0}
+        logger.info(f"Transferred {transferred / MB:.1f} MB. Took {seconds:.2f} seconds "
+                    f"({summary['bytes_per_second'] / MB:.2f} MB/s).")
+        return summary
+
+
+class SftpPool:
+    """Process-wide pool of SFTP connections keyed by host, port and username. Each pool keeps one authenticated SSH
+    transport alive (with keepalive packets) and shares it, since paramiko multiplexes any number of SFTP channels
+    over one transport; hand out independent channels with `open_channel`. A connection idle for longer than
+    `health_check_interval` seconds is checked with a round trip before it's reused, and one that is dead or idle for
+    longer than `max_idle_time` is closed and replaced. Pool options are taken from the first `get_pool` call for a
+    host and user.
+
+    Channels opened over the pooled connection count as using it until they're closed (or garbage collected), so a
+    connection with open channels is never closed as idle, or health-checked, from under them."""
+
+    _pools: Dict[Tuple[str, int, str], "SftpPool"] = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(self, connect_kwargs: Dict[str, Any], max_idle_time: float = 1800, health_check_interval: float = 60,
+                 keepalive_interval: int = 30):
+        self.connect_kwargs = connect_kwargs
+        self.max_idle_time = max_idle_time
+        self.health_check_interval = health_check_interval
+        self.keepalive_interval = keepalive_interval
+        self._conn: Optional[Sftp] = None
+        self._last_used = 0.0
+        self._leases = 0
+        # Set while one thread health-checks or replaces the connection, which other threads wait for
+        self._checking = False
+        # Reentrant, since a channel's lease can be released by the garbage collector while the lock is held
+        self._condition = threading.Condition(threading.RLock())
+
+    @classmethod
+    def get_pool(cls, connect_kwargs: Dict[str, Any], **pool_kwargs) -> "SftpPool":
+        key = (connect_kwargs["host"], connect_kwargs.get("port", 22), connect_kwargs["username"])
+
+        with cls._pools_lock:
+            for pool in cls._pools.values():
+                pool._evict_idle()
+
+            if key not in cls._pools:
+                cls._pools[key] = cls(connect_kwargs, **pool_kwargs)
+            return cls._pools[key]
+
+    @classmethod
+    def close_all(cls):
+        with cls._pools_lock:
+            for pool in cls._pools.values():
+                pool.close()
+            cls._pools.clear()
+
+    def connection(self) -> Sftp:
+        """Shared connection, reconnecting if it was closed, failed its health check or has been idle too long."""
+        with self._condition:
+            while self._checking:
+                self._condition.wait()
+
+            conn, idle_time = self._conn, self._get_idle_time()
+
+            if conn is not None and self._is_active(conn) and idle_time < self.health_check_interval:
+                self._last_used = time.monotonic()
+                return conn
+
+            self._checking = True
+
+        # The health check round trip and the SSH handshake run outside the lock, so channels of the current
+        # connection can still be leased and released meanwhile. Other threads wait in the loop above, rather than
+        # use a connection that may be dead or open one of their own.
+        try:
+            if conn is not None and not self._is_healthy(conn, idle_time):
+                with self._condition:
+                    self._conn = None
+                self._discard(conn)
+                conn = None
+
+            if conn is None:
+                logger.info(f"Opening new pooled sftp connection to {self.connect_kwargs['host']}.")
+                conn = Sftp(**self.connect_kwargs)
+                conn._transport.set_keepalive(self.keepalive_interval)
+                conn._pool = self
+
+            with self._condition:
+                if conn is not self._conn:
+                    self._conn, self._leases = conn, 0
+                self._last_used = time.monotonic()
+            return conn
+        finally:
+            with self._condition:
+                self._checking = False
+                self._condition.notify_all()
+
+    def open_channel(self) -> paramiko.SFTPClient:
+        """Independent SFTP channel over the shared transport, for use by one thread. Close it when done."""
+        return self.connection().open_channel()
+
+    def close(self):
+        with self._condition:
+            conn, self._conn = self._conn, None
+        self._discard(conn)
+
+    def _lease(self, channel: paramiko.SFTPClient):
+        """Count `channel` as using the connection until it's closed or garbage collected."""
+        with self._condition:
+            self._leases += 1
+            self._last_used = time.monotonic()
+
+        released = weakref.finalize(channel, self._release, self._conn)
+        close = channel.close
+
+        def close_and_release():
+            close()
+            released()
+
+        channel.close = close_and_release
+
+    def _release(self, conn: Sftp):
+        with self._condition:
+            # Leases of a connection that has since been replaced don't count against the new one
+            if conn is self._conn:
+                self._leases -= 1
+                self._last_used = time.monotonic()
+
+    def _get_idle_time(self) -> float:
+        return 0.0 if self._leases else time.monotonic() - self._last_used
+
+    def _evict_idle(self):
+        with self._condition:
+            if self._conn is None or self._checking or self._get_idle_time() <= self.max_idle_time:
+                return
+
+            logger.info(f"Closing idle pooled sftp connection to {self.connect_kwargs['host']}.")
+            conn, self._conn = self._conn, None
+        self._discard(conn)
+
+    @staticmethod
+    def _is_active(conn: Sftp) -> bool:
+        return conn._transport is not None and conn._transport.is_active()
+
+    def _is_healthy(self, conn: Sftp, idle_time: float) -> bool:
+        if not self._is_active(conn) or idle_time > self.max_idle_time:
+            return False
+        if idle_time < self.health_check_interval:
+            return True
+
+        try:
+            conn.normalize(".")
+            return True
+        except Exception as e:
+            logger.info(f"Pooled sftp connection failed health check: {e}")
+            return False
+
+    @staticmethod
+    def _discard(conn: Optional[Sftp]):
+        if conn is None:
+            return
+
+        try:
+            conn.close()
+        except Exception as e:
+            logger.debug(f"Error closing sftp connection: {e}")
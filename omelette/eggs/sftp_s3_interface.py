@@ -1,15 +1,25 @@
 import logging
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Optional
 
-from .s3 import S3
-from .sftp import Sftp
+import paramiko
+
+from .s3 import MB, S3
+from .sftp import Sftp, read_range
 
 logger = logging.getLogger(__name__)
 
 
 class TransferException(Exception):
-    pass
+    def __init__(self, message, manifest: Optional[Dict[str, Any]] = None):
+        super().__init__(message)
+        # For syncs, the manifest of what was transferred, skipped and failed (with the errors)
+        self.manifest = manifest
 
 
 class SftpS3Interface:
@@ -36,11 +46,61 @@ class SftpS3Interface:
 
         return download_file_path
 
+    def stream_sftp_to_s3(self, filename: str, sftp_directory: str, s3_bucket: str, s3_key: str,
+                          part_size: Optional[int] = None, max_parts_in_flight: int = 4, retry_count: int = 3,
+                          progress_callback: Optional[Callable[[int, Optional[int], float], None]] = None,
+                          sftp: Optional[paramiko.SFTPClient] = None) -> Dict[str, Any]:
+        """Stream file from SFTP server to S3 without writing it to disk. The file is read in parts (each part's
+        SFTP reads are pipelined) that are uploaded as a multipart upload while the next part is read, so the
+        transfer takes about as long as the slower of the two legs. At most `max_parts_in_flight` + 1 parts are held
+        in memory. `part_size` defaults to the S3 egg's transfer config, and is at least 5 MB. Pass `sftp`, e.g. from
+        `Sftp.open_channel`, to read over another channel than the interface's connection. Returns a summary with
+        bytes, parts and timing."""
+        t1 = time.monotonic()
+        sftp = sftp or self.sftp_conn
+        remote_path = f"{sftp_directory}/{filename}"
+
+        try:
+            file_size = sftp.stat(remote_path).st_size
+            # S3 allows parts of at least 5 MB (except the last one) and at most 10,000 parts
+            part_size = max(part_size or self.s3_client.transfer_config.multipart_chunksize, 5 * MB,
+                            -(-file_size // 10_000))
+
+            logger.info(f"Streaming {remote_path} ({file_size / MB:.1f} MB) to {s3_bucket}/{s3_key} in parts of "
+                        f"{part_size / MB:.1f} MB.")
+
+            with sftp.open(remote_path, "rb") as f:
+                summary = self.s3_client.upload_stream(self._read_parts(f, file_size, part_size), s3_bucket, s3_key,
+                                                       max_parts_in_flight, retry_count, file_size, progress_callback)
+
+            if summary["bytes"] != file_size:
+                raise TransferException(f"Uploaded {summary['bytes']} bytes, expected {file_size}.")
+        except Exception as e:
+            logger.error(f"Error transferring file {filename}: {e}.")
+            raise TransferException(e)
+
+        summary["seconds"] = time.monotonic() - t1
+        summary["bytes_per_second"] = file_size / summary["seconds"] if summary["seconds"] else 0.0
+        logger.info(f"File transfer from SFTP to S3 complete. Took {summary['seconds']:.2f} seconds "
+                    f"({summary['bytes_per_second'] / MB:.2f} MB/s).")
+
+        return summary
+
+    @staticmethod
+    def _read_parts(f, file_size: int, part_size: int) -> Iterator[bytes]:
+        """Read remote file `f` in parts of `part_size`, with the SFTP read requests within each part pipelined."""
+        for offset in range(0, file_size, part_size):
+            end = min(offset + part_size, file_size)
+            part = b"".join(read_range(f, offset, end - offset))
+
+            if len(part) != end - offset:
+                raise TransferException(f"Remote file ended at {offset + len(part)} bytes, expected {file_size}.")
+
+            yield part
+
     def transfer_s3_to_sftp(self, s3_bucket: str, s3_key: str, file_name: str, sftp_directory: str,
                             download_path: Optional[str] = "/tmp") -> str:
         """Download file from S3, then put it on SFTP server. Returns original file name."""
-        self.sftp_conn.chdir(sftp_directory)
-
         t1 = datetime.now()
         logger.info(f"Transfer S3 to SFTP start time: {t1}")
 
@@ -49,7 +109,7 @@ class SftpS3Interface:
         self.s3_client.download_file(s3_bucket, s3_key, file_path)
 
         try:
-            self.sftp_conn.put(file_path)
+            self.sftp_conn.put(file_path, f"{sftp_directory}/{file_name}")
         except Exception as e:
             logger.error(f"Error transferring file {file_name}: {e}.")
             raise TransferException(e)
@@ -58,3 +118,168 @@ class SftpS3Interface:
         logger.info(f"File transfer from S3 to SFTP complete. Took {t2 - t1} seconds.")
 
         return file_name
+
+    def stream_s3_to_sftp(self, s3_bucket: str, s3_key: str, file_name: str, sftp_directory: str,
+                          part_size: Optional[int] = None, parts_ahead: int = 2, retry_count: int = 3,
+                          progress_callback: Optional[Callable[[int, Optional[int], float], None]] = None,
+                          sftp: Optional[paramiko.SFTPClient] = None) -> Dict[str, Any]:
+        """Stream file from S3 to SFTP server without writing it to disk. The object is read with ranged GETs, up to
+        `parts_ahead` parts ahead of the SFTP writes, and written to a remote file with pipelined writes. Uses the
+        absolute remote path instead of changing the connection's directory, so the connection can be shared. The
+        remote file size is checked against the object's at the end. Pass `sftp`, e.g. from `Sftp.open_channel`, to
+        write over another channel than the interface's connection. Returns a summary with bytes and timing."""
+        t1 = time.monotonic()
+        sftp = sftp or self.sftp_conn
+        remote_path = f"{sftp_directory}/{file_name}"
+        logger.info(f"Streaming {s3_bucket}/{s3_key} to {remote_path}.")
+        written = 0
+
+        try:
+            parts = self.s3_client.download_stream(s3_bucket, s3_key, part_size, parts_ahead, retry_count,
+                                                   progress_callback)
+
+            with sftp.open(remote_path, "wb") as f:
+                # Don't wait for the server to acknowledge each write before sending the next one
+                f.set_pipelined(True)
+
+                for part in parts:
+                    f.write(part)
+                    written += len(part)
+
+            remote_size = sftp.stat(remote_path).st_size
+
+            if remote_size != written:
+                raise TransferException(f"Remote file is {remote_size} bytes, expected {written}.")
+        except Exception as e:
+            logger.error(f"Error transferring file {file_name}: {e}.")
+            raise TransferException(e)
+
+        seconds = time.monotonic() - t1
+        summary = {"bytes": written, "seconds": seconds, "bytes_per_second": written / seconds if seconds else 0.0}
+        logger.info(f"File transfer from S3 to SFTP complete. Took {seconds:.2f} seconds "
+                    f"({summary['bytes_per_second'] / MB:.2f} MB/s).")
+
+        return summary
+
+    def sync_sftp_dir_to_s3(self, sftp_directory: str, s3_bucket: str, s3_prefix: str = "", max_workers: int = 4,
+                            filter_func: Optional[Callable[[str], bool]] = None, max_parts_in_flight: int = 2,
+                            retry_count: int = 3) -> Dict[str, Any]:
+        """Stream every file in `sftp_directory` (for which `filter_func(file_name)` is true, if given) to
+        `s3_prefix`, skipping files whose object already exists with the same size and is newer than the remote
+        file. Up to `max_workers` files are transferred concurrently, each worker on its own SFTP channel. Returns a
+        manifest of transferred files with per-file timings, skipped and failed files (with the error), and totals.
+        If any file failed, raises TransferException with the manifest attached."""
+        logger.info(f"Syncing {sftp_directory} to s3://{s3_bucket}/{s3_prefix} with {max_workers} workers.")
+        objects = {}
+
+        for page in self.s3_client.client.get_paginator("list_objects_v2").paginate(Bucket=s3_bucket,
+                                                                                   Prefix=s3_prefix):
+            objects.update({obj["Key"]: obj for obj in page.get("Contents", [])})
+
+        def get_tasks():
+            for attr in self.sftp_conn.listdir_attr(sftp_directory):
+                if not stat.S_ISREG(attr.st_mode) or (filter_func and not filter_func(attr.filename)):
+                    continue
+
+                key = f"{s3_prefix.rstrip('/')}/{attr.filename}" if s3_prefix else attr.filename
+                obj = objects.get(key)
+                changed = (obj is None or obj["Size"] != attr.st_size
+                           or obj["LastModified"].timestamp() < attr.st_mtime)
+
+                if changed:
+                    yield attr.filename, partial(self.stream_sftp_to_s3, attr.filename, sftp_directory, s3_bucket, key,
+                                                 max_parts_in_flight=max_parts_in_flight, retry_count=retry_count)
+                else:
+                    yield attr.filename, None
+
+        return self._sync(get_tasks(), max_workers)
+
+    def sync_s3_prefix_to_sftp(self, s3_bucket: str, s3_prefix: str, sftp_directory: str, max_workers: int = 4,
+                               filter_func: Optional[Callable[[str], bool]] = None, parts_ahead: int = 2,
+                               retry_count: int = 3) -> Dict[str, Any]:
+        """Stream every object directly under `s3_prefix` (for which `filter_func(key)` is true, if given) to
+        `sftp_directory`, skipping objects whose remote file already exists with the same size and is newer than
+        the object. `s3_prefix` is a "directory", e.g. "exports" means "exports/". Up to `max_workers` objects are
+        transferred concurrently, each worker on its own SFTP channel. Returns a manifest of transferred files with
+        per-file timings, skipped and failed files (with the error), and totals. If any file failed, raises
+        TransferException with the manifest attached."""
+        # With Delimiter="/", only keys directly under a prefix ending in "/" are listed as objects
+        if s3_prefix and not s3_prefix.endswith("/"):
+            s3_prefix += "/"
+
+        logger.info(f"Syncing s3://{s3_bucket}/{s3_prefix} to {sftp_directory} with {max_workers} workers.")
+        remote_files = {attr.filename: attr for attr in self.sftp_conn.listdir_attr(sftp_directory)}
+
+        def get_tasks():
+            pages = self.s3_client.client.get_paginator("list_objects_v2").paginate(Bucket=s3_bucket,
+                                                                                    Prefix=s3_prefix, Delimiter="/")
+            for page in pages:
+                for obj in page.get("Contents", []):
+                    key = obj["Key"]
+                    file_name = key.rsplit("/", 1)[-1]
+
+                    if not file_name or (filter_func and not filter_func(key)):
+                        continue
+
+                    attr = remote_files.get(file_name)
+                    changed = (attr is None or attr.st_size != obj["Size"]
+                               or attr.st_mtime < obj["LastModified"].timestamp())
+
+                    if changed:
+                        yield key, partial(self.stream_s3_to_sftp, s3_bucket, key, file_name, sftp_directory,
+                                           parts_ahead=parts_ahead, retry_count=retry_count)
+                    else:
+                        yield key, None
+
+        return self._sync(get_tasks(), max_workers)
+
+    def _sync(self, tasks: Iterator, max_workers: int) -> Dict[str, Any]:
+        """Run (name, transfer) tasks on `max_workers` threads, each with its own SFTP channel. A transfer of None
+        is a skipped file."""
+        t1 = time.monotonic()
+        manifest: Dict[str, Any] = {"transferred": [], "skipped": [], "failed": [], "bytes": 0}
+        channels: List[paramiko.SFTPClient] = []
+        local = threading.local()
+        lock = threading.Lock()
+
+        def get_channel() -> paramiko.SFTPClient:
+            if not hasattr(local, "channel"):
+                local.channel = self.sftp_conn.open_channel()
+                with lock:
+                    channels.append(local.channel)
+            return local.channel
+
+        def run(name: str, transfer: Callable[..., Dict[str, Any]]):
+            try:
+                summary = transfer(sftp=get_channel())
+                with lock:
+                    manifest["transferred"].append({"name": name, "bytes": summary["bytes"],
+                                                    "seconds": summary["seconds"]})
+                    manifest["bytes"] += summary["bytes"]
+            except Exception as e:
+                logger.error(f"Error syncing {name}: {e}")
+                with lock:
+                    manifest["failed"].append({"name": name, "error": str(e)})
+
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for name, transfer in tasks:
+                    if transfer is None:
+                        manifest["skipped"].append(name)
+                    else:
+                        executor.submit(run, name, transfer)
+        finally:
+            for channel in channels:
+                channel.close()
+
+        manifest["seconds"] = time.monotonic() - t1
+        manifest["bytes_per_second"] = manifest["bytes"] / manifest["seconds"] if manifest["seconds"] else 0.0
+        logger.info(f"Synced {len(manifest['transferred'])} files ({manifest['bytes'] / MB:.1f} MB), skipped "
+                    f"{len(manifest['skipped'])}, failed {len(manifest['failed'])}. Took {manifest['seconds']:.2f} "
+                    f"seconds ({manifest['bytes_per_second'] / MB:.2f} MB/s).")
+
+        if manifest["failed"]:
+            failed = [f["name"] for f in manifest["failed"]]
+            raise TransferException(f"Failed to transfer {len(failed)} files: {failed}", manifest)
+
+        return manifest
@@ -1,18 +1,22 @@
 import logging
 import os
-from typing import Dict, Any, List, Union, cast
+from typing import Dict, Any, List, Optional, Union, cast
 
 from slack import WebClient
 from slack.errors import SlackApiError
 
+from omelette.core.retry import RetryPolicy
+
 logger = logging.getLogger(__name__)
 
 
 class Slack:
     """Wrapper around Slack WebClient. Adds retry logic to posting messages, and a simple entrypoint for sending alerts."""
 
-    def __init__(self, api_token: str, channel_id: str, app_name: str, enabled: bool = False, **kwargs):
+    def __init__(self, api_token: str, channel_id: str, app_name: str, enabled: bool = False,
+                 retry_policy: Optional[RetryPolicy] = None, **kwargs):
         self.channel_id = channel_id
+        self.retry_policy = retry_policy
         self.app_name = app_name
         self.client = WebClient(token=api_token)
         self.environment = os.getenv("PROJECT_ENV", "local")
@@ -52,15 +56,10 @@ class Slack:
             self._slack_post_message(job_owner_id, [attachment])
 
     def _slack_post_message(self, channel: str, attachments: List[Dict[str, Any]], retry_count: int = 3):
-        retries = retry_count
-
-        while retries > 0:
-            try:
-                self.client.chat_postMessage(channel=channel, attachments=attachments)
-                break
-            except SlackApiError as e:
-                retries -= 1
-                logger.exception("Error sending slack alert.")
+        policy = self.retry_policy or RetryPolicy(max_attempts=retry_count, retry_on=(SlackApiError,))
 
-                if retries == 0:
-                    raise e
+        try:
+            policy.call(self.client.chat_postMessage, channel=channel, attachments=attachments)
+        except SlackApiError:
+            logger.exception("Error sending slack alert.")
+            raise
@@ -1,19 +1,189 @@
 import csv
 import json
 import logging
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
 
 import snowflake.connector
 from snowflake.connector.cursor import DictCursor
 
+from .batch_writers import BatchWriter, get_batch_writer, get_part_file_name, open_text
+
 logger = logging.getLogger(__name__)
 
 
+class SnowflakePoolTimeoutError(Exception):
+    pass
+
+
+class SnowflakeConnectionPool:
+    """Process-wide pool of Snowflake connections with the same connection parameters, so warm Lambda invocations and
+    parallel steps reuse authenticated sessions instead of reconnecting. At most `max_size` connections are open at
+    once; `acquire` waits up to `timeout` seconds for one to be released. Connections idle for longer than
+    `max_idle_time` seconds are closed, and ones idle for longer than `health_check_interval` are checked with a
+    `SELECT 1` before being handed out. Pool options are taken from the first `get_pool` call for a set of
+    parameters."""
+
+    _pools: Dict[Tuple[Tuple[str, Any], ...], "SnowflakeConnectionPool"] = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(self, connect_kwargs: Dict[str, Any], max_size: int = 8, max_idle_time: float = 1800,
+                 health_check_interval: float = 300, timeout: float = 60):
+        self.connect_kwargs = connect_kwargs
+        self.max_size = max_size
+        self.max_idle_time = max_idle_time
+        self.health_check_interval = health_check_interval
+        self.timeout = timeout
+        self._idle: List[Tuple[float, Any]] = []
+        self._open_count = 0
+        self._condition = threading.Condition()
+
+    @classmethod
+    def get_pool(cls, connect_kwargs: Dict[str, Any], **pool_kwargs) -> "SnowflakeConnectionPool":
+        key = tuple(sorted(connect_kwargs.items()))
+
+        with cls._pools_lock:
+            if key not in cls._pools:
+                cls._pools[key] = cls(connect_kwargs, **pool_kwargs)
+            return cls._pools[key]
+
+    @classmethod
+    def close_all(cls):
+        with cls._pools_lock:
+            for pool in cls._pools.values():
+                pool.close()
+            cls._pools.clear()
+
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+
+        with self._condition:
+            expired = self._take_expired()
+        self._discard(expired)
+
+        while True:
+            with self._condition:
+                while not self._idle and self._open_count >= self.max_size:
+                    remaining = deadline - time.monotonic()
+
+                    if remaining <= 0 or not self._condition.wait(remaining):
+                        raise SnowflakePoolTimeoutError(
+                            f"No Snowflake connection available after {self.timeout} seconds.")
+
+                if not self._idle:
+                    self._open_count += 1
+                    break
+
+                released_at, conn = self._idle.pop()
+
+            # Checked outside the lock, since the health check is a round trip to Snowflake. The connection is no
+            # longer in `_idle`, so no other thread can take it meanwhile.
+            if self._is_healthy(conn, time.monotonic() - released_at):
+                return conn
+
+            self._discard([conn])
+
+        try:
+            logger.info("Opening new pooled Snowflake connection.")
+            return snowflake.connector.connect(client_session_keep_alive=True, **self.connect_kwargs)
+        except Exception:
+            with self._condition:
+                self._open_count -= 1
+                self._condition.notify()
+            raise
+
+    def release(self, conn):
+        with self._condition:
+            if conn.is_closed():
+                self._open_count -= 1
+            else:
+                self._idle.append((time.monotonic(), conn))
+            self._condition.notify()
+
+    def close(self):
+        with self._condition:
+            idle, self._idle = self._idle, []
+        self._discard([conn for _, conn in idle])
+
+    def _take_expired(self) -> List[Any]:
+        now = time.monotonic()
+        expired = [c for c in self._idle if now - c[0] > self.max_idle_time]
+        self._idle = [c for c in self._idle if c not in expired]
+
+        if expired:
+            logger.info(f"Closing {len(expired)} idle pooled Snowflake connection(s).")
+        return [conn for _, conn in expired]
+
+    def _is_healthy(self, conn, idle_time: float) -> bool:
+        if conn.is_closed():
+            return False
+        if idle_time < self.health_check_interval:
+            return True
+
+        try:
+            conn.cursor().execute("SELECT 1").fetchone()
+            return True
+        except Exception as e:
+            logger.info(f"Pooled Snowflake connection failed health check: {e}")
+            return False
+
+    def _discard(self, conns: List[Any]):
+        """Close connections taken out of the pool and free their slots. Must be called without holding the lock."""
+        if not conns:
+            return
+
+        for conn in conns:
+            try:
+                conn.close()
+            except Exception as e:
+                logger.debug(f"Error closing Snowflake connection: {e}")
+
+        with self._condition:
+            self._open_count -= len(conns)
+            self._condition.notify(len(conns))
+
+
+def _split_table_name(table_name: str) -> Tuple[Optional[str], Optional[str], str]:
+    """Split a possibly qualified table name into (database, schema, table), with None for missing parts."""
+    parts = table_name.split(".")
+
+    if len(parts) > 3:
+        raise ValueError(f"Invalid table name: {table_name}. Expected table, schema.table or database.schema.table.")
+    return tuple([None] * (3 - len(parts)) + parts)
+
+
+def _release_unclosed(pool: SnowflakeConnectionPool, conn):
+    logger.warning("Pooled Snowflake object was garbage collected without close(), returning its connection.")
+    pool.release(conn)
+
+
+class SnowflakeQuery(NamedTuple):
+    query_id: str
+    query_string: str
+
+
 class Snowflake:
-    """Wrapper around snowflake.connector. Provides helper methods for common tasks to simplify the API a bit."""
+    """Wrapper around snowflake.connector. Provides helper methods for common tasks to simplify the API a bit.
+
+    With `pooled`, the connection is taken from a process-wide `SnowflakeConnectionPool` for these connection
+    parameters and returned to it on `close()`, so later instances (e.g. in warm Lambda invocations or parallel steps)
+    skip authenticating again. Use as a context manager, or call `close()`, when done; an instance that is garbage
+    collected without being closed returns its connection then, with a warning.
+
+    Example:
+
+    with Snowflake(**settings.snowflake, pooled=True) as sf:
+        sf.query("SELECT 1")
+    """
 
     def __init__(self, user: str, password: str, account: str, region: str, warehouse: str, database: str, role: str,
-                 schema: str = None, **kwargs):
-        self.conn = snowflake.connector.connect(
+                 schema: str = None, pooled: bool = False, pool_size: int = 8, **kwargs):
+        connect_kwargs = dict(
             user=user,
             password=password,
             account=account,
@@ -23,10 +193,34 @@ class Snowflake:
             role=role,
             schema=schema
         )
+
+        if pooled:
+            self.pool = SnowflakeConnectionPool.get_pool(connect_kwargs, max_size=pool_size)
+            self.conn = self.pool.acquire()
+            # Return the connection even if close() is never called, otherwise its slot in the pool is lost
+            self._finalizer = weakref.finalize(self, _release_unclosed, self.pool, self.conn)
+        else:
+            self.pool = None
+            self.conn = snowflake.connector.connect(**connect_kwargs)
         self.cursor = None
 
+    def __enter__(self):
+        return self
+
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.conn.close()
+        self.close()
+
+    def close(self):
+        """Close the connection, or return it to the pool if pooled."""
+        if self.conn is None:
+            return
+
+        if self.pool:
+            self._finalizer.detach()
+            self.pool.release(self.conn)
+        else:
+            self.conn.close()
+        self.conn = None
 
     def query(self, query_string: str):
         logger.info(f"Executing query: {query_string}")
@@ -38,6 +232,160 @@ class Snowflake:
         self.cursor = self.conn.cursor(DictCursor)
         return self.cursor.execute(query_string)
 
+    def stream(self, query_string: str, batch_size: Optional[int] = None, fetch_size: int = 10_000,
+               prefetch_threads: Optional[int] = None, dict_rows: bool = False) -> Iterator[Any]:
+        """Run a query on its own cursor and yield rows one at a time, or lists of `batch_size` rows, without loading
+        the whole result into memory. Rows are fetched `fetch_size` at a time. `prefetch_threads` sets the session's
+        CLIENT_PREFETCH_THREADS, the number of result chunks downloaded in parallel (more threads is faster, but
+        holds more chunks in memory). The previous value is restored once the stream is exhausted or closed, so it
+        doesn't leak to later users of a pooled connection. Unlike `query`/`query_dict`, doesn't replace
+        `self.cursor`, so several streams can be read at once."""
+        previous_prefetch_threads = None
+
+        if prefetch_threads:
+            previous_prefetch_threads = self._get_session_parameter("CLIENT_PREFETCH_THREADS")
+            self.conn.cursor().execute(f"ALTER SESSION SET CLIENT_PREFETCH_THREADS = {prefetch_threads}")
+
+        logger.info(f"Streaming query: {query_string}")
+        cursor = self.conn.cursor(DictCursor) if dict_rows else self.conn.cursor()
+        cursor.arraysize = fetch_size
+
+        try:
+            cursor.execute(query_string)
+            batch = []
+
+            for rows in iter(cursor.fetchmany, []):
+                if not batch_size:
+                    yield from rows
+                    continue
+
+                batch.extend(rows)
+
+                while len(batch) >= batch_size:
+                    yield batch[:batch_size]
+                    batch = batch[batch_size:]
+
+            if batch:
+                yield batch
+        finally:
+            cursor.close()
+
+            if previous_prefetch_threads:
+                self._restore_session_parameter("CLIENT_PREFETCH_THREADS", *previous_prefetch_threads)
+
+    def _get_session_parameter(self, name: str) -> Tuple[str, str]:
+        """Value of a session parameter and the level it's set at: SESSION, USER, ACCOUNT, or empty for the default."""
+        row = self.conn.cursor().execute(f"SHOW PARAMETERS LIKE '{name}' IN SESSION").fetchone()
+        return row[1], row[3]
+
+    def _restore_session_parameter(self, name: str, value: str, level: str):
+        if level == "SESSION":
+            self.conn.cursor().execute(f"ALTER SESSION SET {name} = {value}")
+        else:
+            self.conn.cursor().execute(f"ALTER SESSION UNSET {name}")
+
+    def submit(self, query_string: str) -> "SnowflakeQuery":
+        """Start a query without waiting for it to finish (requires snowflake-connector-python >= 2.5). Pass the
+        returned handles to `gather` to get the results, so independent queries run in the warehouse at the same
+        time."""
+        logger.info(f"Submitting query: {query_string}")
+        cursor = self.conn.cursor()
+        cursor.execute_async(query_string)
+        return SnowflakeQuery(query_id=cursor.sfqid, query_string=query_string)
+
+    def gather(self, handles: List["SnowflakeQuery"], poll_interval: float = 1.0, dict_cursor: bool = False,
+               max_workers: int = 8) -> Iterator[Tuple["SnowflakeQuery", Any]]:
+        """Poll submitted queries and yield (handle, cursor) for each one as soon as it finishes, in order of
+        completion. Each status check is a round trip, so the pending queries are polled concurrently on up to
+        `max_workers` threads. The cursor is positioned on the query's results. Raises if a query failed."""
+        pending = list(handles)
+
+        if not pending:
+            return
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+            while pending:
+                statuses = list(executor.map(lambda h: self.conn.get_query_status_throw_if_error(h.query_id),
+                                             pending))
+
+                for handle, status in zip(list(pending), statuses):
+                    if not self.conn.is_still_running(status):
+                        pending.remove(handle)
+                        cursor = self.conn.cursor(DictCursor) if dict_cursor else self.conn.cursor()
+                        cursor.get_results_from_sfqid(handle.query_id)
+                        logger.info(f"Query {handle.query_id} finished.")
+                        yield handle, cursor
+
+                if pending:
+                    time.sleep(poll_interval)
+
+    def insert_rows(self, table_name: str, rows: Sequence[Union[Sequence[Any], Dict[str, Any]]], columns: List[str],
+                    batch_size: int = 10_000, copy_threshold: int = 100_000) -> Dict[str, Any]:
+        """Insert rows (sequences in `columns` order, or dicts keyed by column) into a table. Fewer than
+        `copy_threshold` rows are inserted with `executemany` in batches of `batch_size`; with the connector's default
+        pyformat paramstyle the values are interpolated client-side and each batch is sent as one multi-row INSERT.
+        Larger inputs are loaded through a stage and COPY with `insert_dataframe` (requires the connector's `pandas`
+        extra). Either way `table_name` and `columns` are used unquoted, so they resolve the same way (case-insensitive)
+        on both paths. Returns a summary with the method used, row count and rows per second."""
+        rows = [tuple(row[col] for col in columns) if isinstance(row, dict) else row for row in rows]
+
+        if len(rows) >= copy_threshold:
+            import pandas
+
+            return self.insert_dataframe(table_name, pandas.DataFrame(rows, columns=columns), quote_identifiers=False)
+
+        t1 = time.monotonic()
+        insert_query = (f"INSERT INTO {table_name} ({', '.join(columns)}) "
+                        f"VALUES ({', '.join(['%s'] * len(columns))})")
+        logger.info(f"Inserting {len(rows)} rows into {table_name}")
+
+        try:
+            cursor = self.conn.cursor()
+
+            for i in range(0, len(rows), batch_size):
+                cursor.executemany(insert_query, rows[i:i + batch_size])
+        except Exception as e:
+            logger.error(f"Error inserting rows: {e}.")
+            raise e
+
+        return self._get_insert_summary(table_name, "executemany", len(rows), time.monotonic() - t1)
+
+    def insert_dataframe(self, table_name: str, data, chunk_size: Optional[int] = None, parallel: int = 4,
+                         quote_identifiers: bool = True) -> Dict[str, Any]:
+        """Bulk load a pandas DataFrame or pyarrow Table into an existing table with `write_pandas`, which writes
+        Parquet files, PUTs them to a temporary stage and runs one COPY. `table_name` may be qualified as
+        schema.table or database.schema.table. With `quote_identifiers`, the table and column names are quoted and so
+        case-sensitive. Returns a summary with row count and rows per second."""
+        from snowflake.connector.pandas_tools import write_pandas
+
+        if hasattr(data, "to_pandas"):
+            data = data.to_pandas()
+
+        database, schema, table = _split_table_name(table_name)
+
+        t1 = time.monotonic()
+        logger.info(f"Loading {len(data)} rows into {table_name}")
+
+        try:
+            success, _, row_count, _ = write_pandas(self.conn, data, table, database=database, schema=schema,
+                                                    chunk_size=chunk_size, parallel=parallel,
+                                                    quote_identifiers=quote_identifiers)
+        except Exception as e:
+            logger.error(f"Error loading dataframe: {e}.")
+            raise e
+
+        if not success:
+            raise Exception(f"Error loading dataframe into {table_name}")
+
+        return self._get_insert_summary(table_name, "write_pandas", row_count, time.monotonic() - t1)
+
+    @staticmethod
+    def _get_insert_summary(table_name: str, method: str, row_count: int, seconds: float) -> Dict[str, Any]:
+        rows_per_second = row_count / seconds if seconds else float(row_count)
+        logger.info(f"Inserted {row_count} rows into {table_name} with {method} in {seconds:.2f} seconds "
+                    f"({rows_per_second:.0f} rows/sec).")
+        return {"method": method, "rows": row_count, "seconds": seconds, "rows_per_second": rows_per_second}
+
     def stage_file(self, file_path: str, stage_name: str, table_name: str = None,
                    file_format: str = None, copy: bool = False) -> None:
         logger.info(f"Staging file {file_path} to stage {stage_name}")
@@ -56,43 +404,223 @@ class Snowflake:
                 logger.error(f"Error copying file: {e}.")
                 raise e
 
-    def copy_staged_file(self, stage_name: str, table_name: str) -> None:
-        pass
+    def stage_files(self, file_paths: Union[str, List[str]], stage_name: str, parallel: int = 4,
+                    auto_compress: bool = True, overwrite: bool = False, max_workers: int = 4) -> List[Dict[str, Any]]:
+        """PUT many files to a stage. `file_paths` is either a glob pattern (e.g. /tmp/export/*.csv), staged with a
+        single PUT, or a list of paths, which are PUT concurrently on up to `max_workers` cursors. `parallel` is the
+        number of threads Snowflake uses to upload each file. Returns PUT results with source, target, status, etc."""
+        options = (f"PARALLEL = {parallel} AUTO_COMPRESS = {str(auto_compress).upper()} "
+                   f"OVERWRITE = {str(overwrite).upper()}")
+
+        def put(file_path: str) -> List[Dict[str, Any]]:
+            logger.info(f"Staging file(s) {file_path} to stage {stage_name}")
+            put_query = f"PUT 'file://{os.path.abspath(file_path)}' @{stage_name} {options}"
+            return self.conn.cursor(DictCursor).execute(put_query).fetchall()
+
+        try:
+            if isinstance(file_paths, str):
+                results = put(file_paths)
+            else:
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    results = [row for rows in executor.map(put, file_paths) for row in rows]
+        except Exception as e:
+            logger.error(f"Error staging files: {e}.")
+            raise e
+
+        failed = [r["source"] for r in results if r["status"] not in {"UPLOADED", "SKIPPED"}]
+
+        if failed:
+            logger.error(f"Files not uploaded to stage {stage_name}: {failed}")
+
+        logger.info(f"Staged {len(results) - len(failed)} file(s) to stage {stage_name}")
+        return results
+
+    def copy_staged_file(self, stage_name: str, table_name: str, files: Optional[List[str]] = None,
+                         pattern: Optional[str] = None, file_format: Optional[str] = None,
+                         on_error: Optional[str] = None, purge: bool = False) -> List[Dict[str, Any]]:
+        """COPY staged files into a table: the given `files` (names relative to the stage, in batches of 1000, the
+        most COPY accepts), the files matching regex `pattern`, or else every file in the stage that hasn't been
+        loaded yet. `file_format` is the name of a file format object. Returns one result per file, with file,
+        status, rows_parsed, rows_loaded, first_error, etc."""
+        options = []
+
+        if pattern:
+            options.append(f"PATTERN = '{pattern}'")
+        if file_format:
+            options.append(f"FILE_FORMAT = (FORMAT_NAME = '{file_format}')")
+        if on_error:
+            options.append(f"ON_ERROR = {on_error}")
+        if purge:
+            options.append("PURGE = TRUE")
+
+        if files:
+            batches = [files[i:i + 1000] for i in range(0, len(files), 1000)]
+            file_lists = ["FILES = (" + ", ".join(f"'{f}'" for f in batch) + ")" for batch in batches]
+        else:
+            file_lists = [""]
+
+        results = []
+
+        for file_list in file_lists:
+            copy_query = " ".join(filter(None, [f"COPY INTO {table_name} FROM @{stage_name}", file_list] + options))
+            logger.info(f"Copying staged files from {stage_name} into {table_name}")
+
+            try:
+                results.extend(self.conn.cursor(DictCursor).execute(copy_query).fetchall())
+            except Exception as e:
+                logger.error(f"Error copying files: {e}.")
+                raise e
+
+        loaded = sum(r.get("rows_loaded") or 0 for r in results)
+        logger.info(f"Loaded {loaded} rows from {len(results)} file(s) into {table_name}")
+
+        return results
+
+    def load_files(self, file_paths: Union[str, List[str]], stage_name: str, table_name: str,
+                   file_format: Optional[str] = None, on_error: Optional[str] = None, purge: bool = False,
+                   parallel: int = 4, max_workers: int = 4) -> List[Dict[str, Any]]:
+        """Bulk load local files into a table: PUT them all with `stage_files`, then load them with one COPY (per 1000
+        files). Returns the COPY result for each file."""
+        staged = self.stage_files(file_paths, stage_name, parallel=parallel, max_workers=max_workers)
+        files = [r["target"] for r in staged if r["status"] in {"UPLOADED", "SKIPPED"}]
+
+        if not files:
+            logger.info(f"No files staged, nothing to copy into {table_name}")
+            return []
+
+        return self.copy_staged_file(stage_name, table_name, files=files, file_format=file_format,
+                                     on_error=on_error, purge=purge)
+
+    def unload_to_stage(self, query_string: str, stage_name: str, prefix: str = "", file_format: str = "CSV",
+                        max_file_size: Optional[int] = None, header: bool = True, overwrite: bool = False,
+                        compression: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Unload query results straight to a (typically external, e.g. S3) stage with COPY INTO @stage. Snowflake
+        writes the files in parallel, so the data never passes through this process. `file_format` is either a format
+        type (CSV, JSON or PARQUET) or the name of a file format object. `max_file_size` is the upper size in bytes of
+        each file. Returns one dict per file written with FILE_NAME, FILE_SIZE and ROW_COUNT."""
+        location = f"@{stage_name}/{prefix.lstrip('/')}" if prefix else f"@{stage_name}"
+
+        if file_format.upper() in {"CSV", "JSON", "PARQUET"}:
+            format_options = f"TYPE = {file_format.upper()}"
+
+            if compression:
+                format_options += f" COMPRESSION = {compression.upper()}"
+        else:
+            format_options = f"FORMAT_NAME = '{file_format}'"
+
+        options = [f"FILE_FORMAT = ({format_options})", f"HEADER = {str(header).upper()}",
+                   f"OVERWRITE = {str(overwrite).upper()}", "DETAILED_OUTPUT = TRUE"]
+
+        if max_file_size:
+            options.append(f"MAX_FILE_SIZE = {max_file_size}")
+
+        copy_query = f"COPY INTO {location} FROM ({query_string.strip().rstrip(';')}) {' '.join(options)}"
+        logger.info(f"Unloading query results to stage: {location}")
+
+        try:
+            files = self.conn.cursor(DictCursor).execute(copy_query).fetchall()
+        except Exception as e:
+            logger.error(f"Error unloading to stage: {e}.")
+            raise e
+
+        logger.info(f"Unloaded {sum(f['ROW_COUNT'] for f in files)} rows to {len(files)} file(s) in {location}")
+        return files
 
     def write_results_to_file(self, *, query_string: str, output_file_name: str, file_format: str = "CSV",
-                              delimiter: str = ",", chunk_size: int = 10_000) -> str:
+                              delimiter: str = ",", chunk_size: int = 10_000, engine: str = "rows",
+                              compression: Optional[str] = None, row_group_size: Optional[int] = None) -> str:
+        """Write query results to a CSV, JSON lines or Parquet file, optionally compressed with gzip or zstd.
+
+        The default "rows" engine builds a dict per row with a DictCursor and supports CSV and JSON. The "arrow" engine
+        reads result batches in Arrow format (requires the connector's `pandas` extra) and writes each batch in bulk,
+        which is much faster for large exports, keeps only one batch in memory, and also supports Parquet."""
+        if engine.lower() == "arrow" or file_format.upper() == "PARQUET":
+            files = self.write_results_to_files(query_string=query_string, output_file_name=output_file_name,
+                                                file_format=file_format, delimiter=delimiter, compression=compression,
+                                                row_group_size=row_group_size)
+            return files[0] if files else output_file_name
+        elif engine.lower() != "rows":
+            raise ValueError(f"Invalid engine: {engine}. Expected 'rows' or 'arrow'.")
+
         logger.info(f"Writing SF query results to file: {output_file_name}")
+        file_format = file_format.upper()
 
-        with open(output_file_name, "w") as f:
+        with open_text(output_file_name, compression) as f:
             rows = []
             processed_count = 0
             results = self.query_dict(query_string)
 
-            if file_format.upper() == "CSV":
+            if file_format == "CSV":
                 writer = csv.DictWriter(f, delimiter=delimiter, fieldnames=[col[0] for col in self.cursor.description])
                 writer.writeheader()
 
             for row in results:
                 processed_count += 1
 
-                if file_format.upper() == "JSON":
-                    rows.append(json.dumps(row))
-                elif file_format.upper() == "CSV":
+                if file_format == "JSON":
+                    rows.append(json.dumps(row) + "\n")
+                elif file_format == "CSV":
                     rows.append(row)
 
                 if len(rows) % chunk_size == 0:
-                    if file_format.upper() == "JSON":
+                    if file_format == "JSON":
                         f.write("".join(rows))
-                    elif file_format.upper() == "CSV":
+                    elif file_format == "CSV":
                         writer.writerows(rows)
 
                     rows = []
 
             if len(rows) > 0:
-                if file_format.upper() == "JSON":
+                if file_format == "JSON":
                     f.write("".join(rows))
-                elif file_format.upper() == "CSV":
+                elif file_format == "CSV":
                     writer.writerows(rows)
 
         logger.info(f"Successfully wrote SF query results to file: {output_file_name}")
         return output_file_name
+
+    def write_results_to_files(self, *, query_string: str, output_file_name: str, file_format: str = "CSV",
+                               delimiter: str = ",", compression: Optional[str] = None,
+                               max_file_size: Optional[int] = None, row_group_size: Optional[int] = None) -> List[str]:
+        """Stream query results in Arrow batches to CSV, JSON lines (JSON/NDJSON) or Parquet files. With
+        `max_file_size` (bytes, after compression), a new part file is started once the current one reaches that size,
+        named like export_0000.csv.gz, export_0001.csv.gz, etc. Returns the list of files written. An empty result
+        writes no Parquet file, since the schema comes from the first batch."""
+        logger.info(f"Writing SF query results to file(s) in batches: {output_file_name}")
+
+        t1 = datetime.now()
+        processed_count = 0
+        files = []
+        writer = None
+        cursor = self.conn.cursor()
+
+        def open_writer() -> BatchWriter:
+            path = get_part_file_name(output_file_name, len(files)) if max_file_size else output_file_name
+            files.append(path)
+            return get_batch_writer(file_format, path, columns, compression, delimiter, row_group_size)
+
+        try:
+            cursor.execute(query_string)
+            columns = [col[0] for col in cursor.description]
+
+            for batch in cursor.fetch_arrow_batches():
+                writer = writer or open_writer()
+                writer.write(batch)
+                processed_count += batch.num_rows
+                logger.debug(f"Wrote {processed_count} rows to {writer.path}")
+
+                if max_file_size and writer.size >= max_file_size:
+                    writer.close()
+                    writer = None
+
+            if not files and file_format.upper() != "PARQUET":
+                writer = open_writer()
+        finally:
+            if writer:
+                writer.close()
+            cursor.close()
+
+        t2 = datetime.now()
+        logger.info(f"Successfully wrote {processed_count} SF query result rows to {len(files)} file(s). "
+                    f"Took {t2 - t1} seconds.")
+        return files
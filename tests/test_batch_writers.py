@@ -0,0 +1,63 @@
+import gzip
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from omelette.eggs.batch_writers import get_batch_writer, open_text
+
+pa = pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def table():
+    return pa.table({
+        "ID": pa.array([1, None, 3], pa.int64()),
+        "AMOUNT": pa.array([Decimal("1.50"), None, Decimal("3.25")], pa.decimal128(10, 2)),
+        "CREATED": pa.array([datetime(2026, 10, 18, 1, 2, 3), None, None], pa.timestamp("us")),
+    })
+
+
+def write(tmp_path, file_format, table, compression=None):
+    path = str(tmp_path / "out")
+    writer = get_batch_writer(file_format, path, table.column_names, compression)
+    writer.write(table)
+    writer.close()
+    return path
+
+
+def test_csv_keeps_integers_with_nulls(tmp_path, table):
+    path = write(tmp_path, "CSV", table)
+
+    with open(path) as f:
+        assert f.read().splitlines() == ["ID,AMOUNT,CREATED", "1,1.50,2026-10-18 01:02:03", ",,", "3,3.25,"]
+
+
+def test_ndjson_keeps_integers_with_nulls(tmp_path, table):
+    path = write(tmp_path, "NDJSON", table)
+
+    with open(path) as f:
+        rows = [json.loads(line) for line in f]
+
+    assert rows[0] == {"ID": 1, "AMOUNT": "1.50", "CREATED": "2026-10-18T01:02:03"}
+    assert rows[1] == {"ID": None, "AMOUNT": None, "CREATED": None}
+
+
+def test_gzip_csv(tmp_path, table):
+    path = write(tmp_path, "CSV", table, "gzip")
+
+    with gzip.open(path, "rt") as f:
+        assert f.readline() == "ID,AMOUNT,CREATED\n"
+
+
+def test_open_text_closes_file(tmp_path, monkeypatch):
+    opened = []
+    monkeypatch.setattr("builtins.open", lambda *args, _open=open: opened.append(_open(*args)) or opened[-1])
+
+    with open_text(str(tmp_path / "out.csv.gz"), "gzip") as f:
+        f.write("ID\n1\n")
+
+    assert opened[0].closed
+    with gzip.open(tmp_path / "out.csv.gz", "rt") as f:
+        assert f.read() == "ID\n1\n"
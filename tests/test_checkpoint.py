@@ -0,0 +1,62 @@
+import threading
+
+import pytest
+
+from omelette.core.checkpoint import CheckpointError, CheckpointStore
+from omelette.core.recipe import Recipe, step
+
+
+class Params:
+    def __init__(self, day):
+        self.day = day
+
+
+def get_key(*args, **kwargs):
+    return CheckpointStore.get_key("job", "run", "step", args, kwargs)
+
+
+def test_key_depends_on_argument_contents_not_identity():
+    assert get_key(Params("2026-10-18")) == get_key(Params("2026-10-18"))
+    assert get_key(Params("2026-10-18")) != get_key(Params("2026-10-19"))
+
+
+def test_key_differs_for_values_with_same_truncated_repr():
+    pd = pytest.importorskip("pandas")
+    first = pd.DataFrame({"id": range(1000)})
+    second = first.copy()
+    second.loc[500, "id"] = -1
+
+    assert repr(first) == repr(second)
+    assert get_key(first) != get_key(second)
+
+
+def test_unpicklable_arguments_are_refused():
+    with pytest.raises(CheckpointError):
+        get_key(threading.Lock())
+
+
+@pytest.fixture
+def context(tmp_path):
+    Recipe.cleanup()
+    _context = Recipe.get_context()
+    _context.job_name = "job"
+    _context.run_id = "run"
+    _context.checkpoint_location = str(tmp_path)
+    _context._checkpoint_store = None
+    yield _context
+    Recipe.cleanup()
+
+
+def test_resume_skips_checkpointed_step(context):
+    calls = []
+
+    @step(checkpoint=True, checkpoint_key=lambda lock, day: day)
+    def extract(context: Recipe, lock, day):
+        calls.append(day)
+        return f"result-{day}"
+
+    assert extract(threading.Lock(), "2026-10-18") == "result-2026-10-18"
+    context.resume = True
+    assert extract(threading.Lock(), "2026-10-18") == "result-2026-10-18"
+    assert extract(threading.Lock(), "2026-10-19") == "result-2026-10-19"
+    assert calls == ["2026-10-18", "2026-10-19"]
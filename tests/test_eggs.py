@@ -0,0 +1,10 @@
+import subprocess
+import sys
+
+
+def test_eggs_are_imported_lazily():
+    code = ("import sys, omelette.eggs; "
+            "print([m for m in ('boto3', 'snowflake.connector', 'pysftp', 'slack', 'kafka') if m in sys.modules])")
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+
+    assert output.strip() == "[]"
@@ -0,0 +1,81 @@
+import threading
+
+import pytest
+
+from omelette.core.pipeline import Pipeline, PipelineError
+from omelette.core.recipe import Recipe, step
+
+
+@pytest.fixture
+def context():
+    Recipe.cleanup()
+    yield Recipe.get_context()
+    Recipe.cleanup()
+
+
+def test_steps_get_dependency_results_in_order(context):
+    @step
+    def extract_a(context):
+        return "a"
+
+    @step
+    async def extract_b(context):
+        return "b"
+
+    @step(depends_on=[extract_b, extract_a])
+    def load(context, b, a):
+        return b + a
+
+    assert Pipeline(load).run() == {"extract_a": "a", "extract_b": "b", "load": "ba"}
+
+
+def test_independent_steps_run_concurrently(context):
+    barrier = threading.Barrier(2, timeout=5)
+
+    @step
+    def first(context):
+        return barrier.wait()
+
+    @step
+    def second(context):
+        return barrier.wait()
+
+    @step(depends_on=[first, second])
+    def both(context, *indexes):
+        return sorted(indexes)
+
+    assert Pipeline(both, max_workers=2).run()["both"] == [0, 1]
+
+
+def test_failed_step_stops_dependents(context):
+    ran = []
+
+    @step
+    def extract(context):
+        raise ValueError("extract failed")
+
+    @step(depends_on=[extract])
+    def load(context, data):
+        ran.append(data)
+
+    with pytest.raises(ValueError, match="extract failed"):
+        Pipeline(load).run()
+    assert ran == []
+
+
+def test_cycles_and_unknown_dependencies_are_rejected():
+    def first(context):
+        pass
+
+    def second(context):
+        pass
+
+    first.depends_on = ["second"]
+    second.depends_on = [first]
+
+    with pytest.raises(PipelineError, match="Cycle"):
+        Pipeline(second)
+
+    first.depends_on = ["missing"]
+    with pytest.raises(PipelineError, match="Unknown step missing"):
+        Pipeline(first)
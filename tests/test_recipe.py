@@ -0,0 +1,165 @@
+import asyncio
+import importlib.util
+import os
+import sys
+
+import pytest
+
+from omelette.core.recipe import Recipe, step
+from omelette.core.retry import RetryPolicy
+from omelette.core.settings import clear_settings_cache
+
+recipe_module = sys.modules["omelette.core.recipe"]
+
+
+@pytest.fixture
+def recipe_dir(tmp_path):
+    for job_name in ["j1", "j2"]:
+        job_dir = tmp_path / "jobs" / job_name
+        job_dir.mkdir(parents=True)
+        (job_dir / "settings.toml").write_text(f'[default]\nname = "{job_name}"\n\n'
+                                               '[default.slack]\napi_token = "token"\napp_name = "app"\n')
+        (job_dir / f"{job_name}.py").write_text("")
+
+    Recipe.cleanup()
+    Recipe.invalidate_warm_state()
+    yield str(tmp_path)
+    Recipe.cleanup()
+    Recipe.invalidate_warm_state()
+    clear_settings_cache()
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Stubs out the expensive parts of `init_recipe` (listing jobs, init_logging, importing the job module) and counts
+    their calls."""
+    counts = {"listdir": 0, "init_logging": 0, "import_module": 0}
+    listdir = recipe_module.os.listdir
+
+    def count(name, result=None):
+        def wrapper(*args, **kwargs):
+            counts[name] += 1
+            return result(*args) if result else name
+        return wrapper
+
+    monkeypatch.setattr(recipe_module.os, "listdir", count("listdir", listdir))
+    monkeypatch.setattr(recipe_module, "init_logging", count("init_logging"))
+    monkeypatch.setattr(recipe_module, "import_module", count("import_module"))
+    return counts
+
+
+def init(recipe_dir, job_name, **event):
+    _recipe = Recipe(is_lambda=True)
+    return _recipe.init_recipe(recipe_dir, dict(event, job_name=job_name), {"request": job_name})
+
+
+def test_warm_init_skips_job_setup_but_updates_invocation(recipe_dir, calls):
+    init(recipe_dir, "j1", run_id="first")
+    assert calls == {"listdir": 1, "init_logging": 1, "import_module": 1}
+
+    _recipe = init(recipe_dir, "j1", run_id="second", resume=True)
+
+    assert calls == {"listdir": 1, "init_logging": 1, "import_module": 1}
+    assert _recipe.lambda_event == {"job_name": "j1", "run_id": "second", "resume": True}
+    assert _recipe.lambda_context == {"request": "j1"}
+    assert _recipe.run_id == "second"
+    assert _recipe.resume
+    assert _recipe.job_module == "import_module"
+    assert _recipe.settings.name == "j1"
+
+
+def test_invalidate_warm_state_for_one_job(recipe_dir, calls):
+    init(recipe_dir, "j1")
+    init(recipe_dir, "j2")
+
+    Recipe.invalidate_warm_state(job_name="j1")
+    init(recipe_dir, "j1")
+    init(recipe_dir, "j2")
+
+    assert calls == {"listdir": 3, "init_logging": 3, "import_module": 3}
+
+
+ASYNC_RECIPE = """
+from omelette.core.recipe import Recipe, recipe
+
+
+@recipe
+async def main(context):
+    return context.job_name, context.run_id
+
+
+@recipe(is_lambda=True)
+async def handler(context, event, lambda_context):
+    return context.job_name, context.run_id
+
+
+class AsyncRecipe(Recipe):
+    async def run(self):
+        return self.job_name, self.run_id
+
+
+lambda_handler = AsyncRecipe.get_handler()
+"""
+
+
+@pytest.fixture
+def async_recipe(recipe_dir, calls, monkeypatch):
+    path = os.path.join(recipe_dir, "async_recipe.py")
+
+    with open(path, "w") as f:
+        f.write(ASYNC_RECIPE)
+
+    spec = importlib.util.spec_from_file_location("async_recipe", path)
+    module = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, "async_recipe", module)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_async_recipe_run_directly(async_recipe, monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["async_recipe.py", "-j", "j1", "--run-id", "r1"])
+
+    assert async_recipe.main() == ("j1", "r1")
+
+
+def test_async_recipe_run_by_lambda_handler(async_recipe):
+    assert async_recipe.handler({"job_name": "j1", "run_id": "r1"}, None) == ("j1", "r1")
+    assert async_recipe.lambda_handler({"job_name": "j2", "run_id": "r2"}, None) == ("j2", "r2")
+
+
+def test_async_step_retries_then_alerts_slack(recipe_dir, calls, monkeypatch):
+    alerts = []
+    monkeypatch.setattr(recipe_module, "_send_slack_alert", lambda settings, message: alerts.append(message))
+    init(recipe_dir, "j1")
+    attempts = []
+
+    @step(retry=RetryPolicy(max_attempts=3), slack_alert=True, slack_message_text="Step failed")
+    async def flaky(context):
+        attempts.append(1)
+        raise ConnectionError("unavailable")
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(flaky())
+
+    assert len(attempts) == 3
+    assert alerts == ["Step failed:\n unavailable"]
+
+
+def test_async_step_max_concurrency(recipe_dir, calls):
+    init(recipe_dir, "j1")
+    in_flight = []
+
+    @step(max_concurrency=2)
+    async def work(context, i):
+        in_flight.append(1)
+        peak = len(in_flight)
+        await asyncio.sleep(0.01)
+        in_flight.pop()
+        return peak
+
+    async def run_all():
+        return await asyncio.gather(*(work(i) for i in range(6)))
+
+    # The limit holds in each event loop, e.g. one per Lambda invocation
+    for _ in range(2):
+        assert max(asyncio.run(run_all())) == 2
@@ -0,0 +1,98 @@
+import asyncio
+import sys
+
+import pytest
+
+from omelette.core.retry import RetryPolicy
+
+retry_module = sys.modules["omelette.core.retry"]
+
+
+class Flaky:
+    def __init__(self, failures, error=ConnectionError):
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+        self.__name__ = "flaky"
+
+    def __call__(self):
+        self.calls += 1
+
+        if self.calls <= self.failures:
+            raise self.error("failed")
+        return "ok"
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr(retry_module.time, "sleep", slept.append)
+    return slept
+
+
+def test_backoff_is_capped():
+    policy = RetryPolicy(base_delay=1, max_delay=5, jitter=0)
+
+    assert [policy.get_delay(attempt) for attempt in range(1, 6)] == [1, 2, 4, 5, 5]
+
+
+def test_jitter_stays_within_delay():
+    policy = RetryPolicy(base_delay=4, jitter=0.5)
+
+    assert all(2 <= policy.get_delay(1) <= 4 for _ in range(100))
+
+
+def test_retries_until_success(sleeps):
+    func = Flaky(failures=2)
+
+    assert RetryPolicy(max_attempts=3, base_delay=1, jitter=0).call(func) == "ok"
+    assert func.calls == 3
+    assert sleeps == [1, 2]
+
+
+def test_gives_up_after_max_attempts(sleeps):
+    func = Flaky(failures=5)
+
+    with pytest.raises(ConnectionError):
+        RetryPolicy(max_attempts=3).call(func)
+    assert func.calls == 3
+
+
+def test_only_retries_listed_exceptions(sleeps):
+    func = Flaky(failures=1, error=KeyError)
+
+    with pytest.raises(KeyError):
+        RetryPolicy(retry_on=(ConnectionError,)).call(func)
+    assert func.calls == 1
+
+
+def test_deadline_stops_retries(sleeps):
+    func = Flaky(failures=1)
+
+    with pytest.raises(ConnectionError):
+        RetryPolicy(base_delay=10, jitter=0, deadline=5).call(func)
+    assert func.calls == 1
+
+
+def test_async_functions_are_awaited(monkeypatch):
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+
+        if len(calls) < 2:
+            raise ConnectionError("failed")
+        return "ok"
+
+    async def no_sleep(delay):
+        pass
+
+    monkeypatch.setattr(retry_module.asyncio, "sleep", no_sleep)
+
+    assert asyncio.run(RetryPolicy().call(flaky)) == "ok"
+    assert len(calls) == 2
+
+
+def test_max_attempts_must_be_positive():
+    with pytest.raises(ValueError):
+        RetryPolicy(max_attempts=0)
@@ -0,0 +1,166 @@
+import os
+
+import pytest
+
+moto = pytest.importorskip("moto")
+
+from omelette.eggs.s3 import MB, S3, S3DownloadError, S3UploadError  # noqa: E402
+
+BUCKET = "bucket"
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+
+    with moto.mock_aws():
+        s3 = S3(transfer_config=S3.get_transfer_config(part_size=5 * MB, max_concurrency=2))
+        s3.client.create_bucket(Bucket=BUCKET)
+        yield s3
+
+
+@pytest.fixture
+def large_file(tmp_path):
+    path = tmp_path / "large.bin"
+    path.write_bytes(os.urandom(12 * MB))
+    return str(path)
+
+
+def start_upload(s3, file_name, part_numbers):
+    """Leave an unfinished multipart upload with some of the file's parts, like an interrupted attempt."""
+    upload_id = s3.client.create_multipart_upload(Bucket=BUCKET, Key="large.bin")["UploadId"]
+
+    with open(file_name, "rb") as f:
+        data = f.read()
+
+    for part_number in part_numbers:
+        body = data[(part_number - 1) * 5 * MB:part_number * 5 * MB]
+        s3.client.upload_part(Bucket=BUCKET, Key="large.bin", UploadId=upload_id, PartNumber=part_number, Body=body)
+    return upload_id
+
+
+def read_object(s3, key):
+    return s3.client.get_object(Bucket=BUCKET, Key=key)["Body"].read()
+
+
+def test_upload_file_resumable_reuses_matching_parts(s3, large_file, monkeypatch):
+    start_upload(s3, large_file, [1, 2])
+    uploaded = []
+    upload_part = s3.client.upload_part
+    monkeypatch.setattr(s3.client, "upload_part", lambda **kwargs: uploaded.append(kwargs["PartNumber"])
+                        or upload_part(**kwargs))
+
+    s3.upload_file_resumable(large_file, BUCKET, "large.bin")
+
+    assert uploaded == [3]
+    assert s3.client.list_multipart_uploads(Bucket=BUCKET).get("Uploads", []) == []
+    with open(large_file, "rb") as f:
+        assert read_object(s3, "large.bin") == f.read()
+
+
+def test_upload_file_resumable_starts_over_for_changed_file(s3, large_file):
+    start_upload(s3, large_file, [1, 2])
+
+    with open(large_file, "r+b") as f:
+        f.seek(MB)
+        f.write(b"changed")
+
+    s3.upload_file_resumable(large_file, BUCKET, "large.bin")
+
+    with open(large_file, "rb") as f:
+        assert read_object(s3, "large.bin") == f.read()
+    metadata = s3.client.head_object(Bucket=BUCKET, Key="large.bin")["Metadata"]
+    assert metadata["source-size"] == str(12 * MB)
+
+
+def test_download_prefix_keeps_paths_relative_to_prefix_directory(s3, tmp_path):
+    for key in ["exports/2026/a.csv", "exports/2026/sub/b.csv", "exports/2026-old/c.csv"]:
+        s3.client.put_object(Bucket=BUCKET, Key=key, Body=key.encode())
+
+    summary = s3.download_prefix(BUCKET, "exports/2026", str(tmp_path / "out"))
+
+    assert summary["transferred"] == 2
+    assert (tmp_path / "out" / "a.csv").read_bytes() == b"exports/2026/a.csv"
+    assert (tmp_path / "out" / "sub" / "b.csv").read_bytes() == b"exports/2026/sub/b.csv"
+    assert not (tmp_path / "out" / "-old").exists()
+
+
+def test_download_prefix_rejects_keys_outside_download_dir(s3, tmp_path):
+    s3.client.put_object(Bucket=BUCKET, Key="exports/a.csv", Body=b"a")
+    s3.client.put_object(Bucket=BUCKET, Key="exports/../../escaped.csv", Body=b"x")
+
+    with pytest.raises(S3DownloadError, match="escaped.csv"):
+        s3.download_prefix(BUCKET, "exports/", str(tmp_path / "out"))
+
+    assert (tmp_path / "out" / "a.csv").exists()
+    assert not (tmp_path / "escaped.csv").exists()
+
+
+@pytest.mark.parametrize("max_workers, per_file", [(1, 2), (5, 2), (8, 1), (32, 1)])
+def test_batch_transfers_fit_connection_pool(s3, tmp_path, monkeypatch, max_workers, per_file):
+    s3.client.put_object(Bucket=BUCKET, Key="exports/a.csv", Body=b"a")
+    (tmp_path / "up").mkdir()
+    (tmp_path / "up" / "b.csv").write_bytes(b"b")
+    configs = []
+    monkeypatch.setattr(s3.client, "download_file", lambda *args, Config: configs.append(Config))
+    monkeypatch.setattr(s3.client, "upload_file", lambda *args, Config: configs.append(Config))
+
+    s3.download_prefix(BUCKET, "exports", str(tmp_path / "out"), max_workers=max_workers)
+    s3.upload_directory(str(tmp_path / "up"), BUCKET, "imports", max_workers=max_workers)
+
+    assert s3.max_pool_connections == 10
+    assert [config.max_request_concurrency for config in configs] == [per_file, per_file]
+    assert s3.transfer_config.max_request_concurrency == 2
+
+
+def test_upload_stream(s3):
+    parts = [os.urandom(5 * MB), os.urandom(5 * MB), b"tail"]
+
+    summary = s3.upload_stream(iter(parts), BUCKET, "streamed.bin")
+
+    assert summary["parts"] == 3
+    assert summary["bytes"] == 10 * MB + 4
+    assert read_object(s3, "streamed.bin") == b"".join(parts)
+
+
+def test_upload_stream_empty(s3):
+    s3.upload_stream(iter([]), BUCKET, "empty.bin")
+
+    assert read_object(s3, "empty.bin") == b""
+
+
+def test_upload_stream_aborts_and_stops_reading_on_failure(s3, monkeypatch):
+    produced = []
+
+    def parts():
+        for i in range(20):
+            produced.append(i)
+            yield os.urandom(5 * MB)
+
+    def upload_part(**kwargs):
+        raise ConnectionError("connection reset")
+
+    monkeypatch.setattr(s3.client, "upload_part", upload_part)
+
+    with pytest.raises(S3UploadError):
+        s3.upload_stream(parts(), BUCKET, "failed.bin", max_parts_in_flight=2, retry_count=1)
+
+    assert len(produced) < 20
+    assert s3.client.list_multipart_uploads(Bucket=BUCKET).get("Uploads", []) == []
+
+
+def test_download_stream(s3):
+    body = os.urandom(5 * MB + 100)
+    s3.client.put_object(Bucket=BUCKET, Key="object.bin", Body=body)
+
+    parts = list(s3.download_stream(BUCKET, "object.bin", part_size=MB, parts_ahead=3))
+
+    assert [len(part) for part in parts] == [MB] * 5 + [100]
+    assert b"".join(parts) == body
+
+
+def test_download_stream_missing_object_raises_right_away(s3):
+    with pytest.raises(Exception, match="404|Not Found"):
+        s3.download_stream(BUCKET, "missing.bin")
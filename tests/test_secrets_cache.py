@@ -0,0 +1,53 @@
+import sys
+
+from omelette.core.settings import SecretsCache
+
+settings_module = sys.modules["omelette.core.settings"]
+
+
+def test_get_and_expire(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(settings_module.time, "monotonic", lambda: now[0])
+    cache = SecretsCache(ttl=10)
+
+    assert cache.get("a") is None
+    cache.set("a", "1")
+    assert cache.get("a") == "1"
+
+    now[0] += 11
+    assert cache.get("a") is None
+    assert cache.stats == {"hits": 1, "misses": 2, "size": 0}
+
+
+def test_evicts_least_recently_used():
+    cache = SecretsCache(ttl=60, max_size=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+
+
+def test_zero_ttl_disables_caching():
+    cache = SecretsCache(ttl=0)
+    cache.set("a", "1")
+
+    assert len(cache) == 0
+
+
+def test_env_vars_read_on_first_use(monkeypatch):
+    cache = SecretsCache()
+    monkeypatch.setenv("SSM_CACHE_TTL", "5")
+    monkeypatch.setenv("SSM_CACHE_MAX_SIZE", "1")
+
+    assert cache.ttl == 5
+    assert cache.max_size == 1
+
+
+def test_invalid_env_var_uses_default(monkeypatch):
+    monkeypatch.setenv("SSM_CACHE_TTL", "five minutes")
+
+    assert SecretsCache().ttl == 300
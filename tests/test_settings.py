@@ -0,0 +1,150 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from botocore.exceptions import ClientError
+
+from omelette.core.recipe import Recipe
+from omelette.core.settings import Settings, clear_settings_cache, secrets_cache
+
+settings_module = sys.modules["omelette.core.settings"]
+
+
+@pytest.fixture
+def recipe_dir(tmp_path, monkeypatch):
+    job_dir = tmp_path / "jobs" / "j1"
+    job_dir.mkdir(parents=True)
+    (job_dir / "settings.toml").write_text('[default]\nname = "j1"\n')
+    (tmp_path / ".env").write_text("JOB_NAME=j1\n")
+
+    monkeypatch.chdir(tmp_path)
+    # load_dotenv sets os.environ directly, so register JOB_NAME for monkeypatch to remove afterwards
+    monkeypatch.setenv("JOB_NAME", "")
+    monkeypatch.delenv("JOB_NAME")
+    monkeypatch.setattr(settings_module, "_env_file_loaded", False)
+    Recipe.cleanup()
+    yield tmp_path
+    Recipe.cleanup()
+    Recipe.invalidate_warm_state()
+
+
+def test_env_file_loaded_before_recipe_reads_env_vars(recipe_dir):
+    recipe = Recipe()
+    recipe._input_args = []
+    recipe.init_recipe(str(recipe_dir))
+
+    assert recipe.job_name == "j1"
+    assert recipe.settings.name == "j1"
+
+
+def test_env_file_searched_once_per_process(recipe_dir, monkeypatch):
+    calls = []
+    monkeypatch.setattr(settings_module, "find_dotenv", lambda **kwargs: calls.append(kwargs) or "")
+
+    assert settings_module.load_env_file() is False
+    settings_module.load_env_file()
+    settings_module.load_env_file(force=True)
+
+    assert len(calls) == 2
+
+
+def test_import_does_not_search_for_env_file_or_import_boto3():
+    script = ("import sys, dotenv; calls = []; dotenv.find_dotenv = lambda **kwargs: calls.append(kwargs) or ''; "
+              "import omelette; print(len(calls), 'boto3' in sys.modules)")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", script], cwd=root, capture_output=True, text=True, check=True).stdout
+
+    assert output.split() == ["0", "False"]
+
+
+def test_settings_without_ssm_values_never_create_ssm_client(tmp_path, monkeypatch):
+    path = tmp_path / "settings.toml"
+    path.write_text('[default]\nname = "a"\n')
+    monkeypatch.setattr(Settings, "_get_ssm_client", lambda self: pytest.fail("SSM client created"))
+
+    loaded = Settings(str(path))
+
+    assert loaded.name == "a"
+    assert loaded._ssm is None
+
+
+class StubSsm:
+    def __init__(self, error_code=None):
+        self.error_code = error_code
+        self.calls = []
+
+    def get_parameters(self, Names, WithDecryption):
+        self.calls.append(("get_parameters", Names))
+
+        if self.error_code:
+            raise ClientError({"Error": {"Code": self.error_code}}, "GetParameters")
+        return {"Parameters": [{"Name": name, "Value": f"value-{name}"} for name in Names]}
+
+    def get_parameter(self, Name, WithDecryption):
+        self.calls.append(("get_parameter", Name))
+        return {"Parameter": {"Name": Name, "Value": f"value-{Name}"}}
+
+
+@pytest.fixture
+def ssm_settings_file(tmp_path):
+    path = tmp_path / "settings.toml"
+    path.write_text("[default]\n" + "".join(f'secret_{i} = "ssm:/app/secret_{i}"\n' for i in range(35)))
+    secrets_cache.clear()
+    clear_settings_cache()
+    yield str(path)
+    secrets_cache.clear()
+    clear_settings_cache()
+
+
+def test_ssm_refs_resolved_in_batches_with_one_client(ssm_settings_file, monkeypatch):
+    client = StubSsm()
+    created = []
+    monkeypatch.setattr(Settings, "_get_ssm_client", lambda self: created.append(1) or client)
+
+    loaded = Settings(ssm_settings_file)
+
+    assert len(created) == 1
+    assert [len(names) for _, names in client.calls] == [10, 10, 10, 5]
+    assert loaded.secret_34 == "value-/app/secret_34"
+
+
+@pytest.mark.parametrize("error_code, individual_calls", [("AccessDeniedException", 35), ("ThrottlingException", 0)])
+def test_ssm_falls_back_to_individual_calls_only_for_parameter_errors(ssm_settings_file, error_code,
+                                                                       individual_calls):
+    client = StubSsm(error_code)
+    loaded = Settings()
+    loaded._ssm = client
+    loaded.load(ssm_settings_file)
+
+    assert len([c for c in client.calls if c[0] == "get_parameter"]) == individual_calls
+
+
+@pytest.fixture
+def settings_file(tmp_path, monkeypatch):
+    path = tmp_path / "settings.toml"
+    path.write_text('[default]\nname = "a"\n')
+    monkeypatch.delenv("NAME", raising=False)
+    clear_settings_cache()
+    yield path
+    clear_settings_cache()
+
+
+def test_settings_snapshot_reused_until_file_or_env_changes(settings_file, monkeypatch):
+    reads = []
+    read_config = Settings._read_config
+    monkeypatch.setattr(Settings, "_read_config", staticmethod(lambda path: reads.append(path) or read_config(path)))
+
+    first = Settings(str(settings_file))
+    first.name = "changed"
+    assert Settings(str(settings_file)).name == "a"
+    assert len(reads) == 1
+
+    monkeypatch.setenv("NAME", "from-env")
+    assert Settings(str(settings_file)).name == "from-env"
+    assert len(reads) == 2
+    monkeypatch.delenv("NAME")
+
+    settings_file.write_text('[default]\nname = "bb"\n')
+    assert Settings(str(settings_file)).name == "bb"
+    assert len(reads) == 3
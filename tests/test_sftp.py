@@ -0,0 +1,101 @@
+import os
+
+import pytest
+
+pytest.importorskip("pysftp")
+
+from benchmarks.sftp_server import HOST, serve  # noqa: E402
+from omelette.eggs.sftp import MB, READ_BLOCK_SIZE, Sftp, read_range  # noqa: E402
+
+pytestmark = pytest.mark.filterwarnings("ignore:Failed to load HostKeys")
+
+
+@pytest.fixture(scope="module")
+def server():
+    return serve()
+
+
+@pytest.fixture
+def sftp(server):
+    port, host_fingerprint = server
+    conn = Sftp(host=HOST, port=port, username="test", password="test", host_fingerprint=host_fingerprint)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def remote_file(tmp_path):
+    path = tmp_path / "remote.bin"
+    path.write_bytes(os.urandom(6 * MB + 123))
+    return path
+
+
+def test_read_range_patches_only_its_own_readv(sftp, remote_file):
+    data = remote_file.read_bytes()
+
+    with sftp.open(str(remote_file), "rb") as f:
+        assert b"".join(read_range(f, 1000, 5 * READ_BLOCK_SIZE + 7)) == data[1000:1000 + 5 * READ_BLOCK_SIZE + 7]
+        assert "_start_prefetch" not in vars(f)
+        assert b"".join(f.readv([(0, 10)])) == data[:10]
+
+
+def test_read_range_falls_back_to_readv():
+    class File:
+        def readv(self, chunks):
+            return [b"x" * length for _, length in chunks]
+
+    assert b"".join(read_range(File(), 0, 2 * READ_BLOCK_SIZE + 1)) == b"x" * (2 * READ_BLOCK_SIZE + 1)
+
+
+def test_get_parallel(sftp, remote_file, tmp_path):
+    local = tmp_path / "local.bin"
+
+    summary = sftp.get_parallel(str(remote_file), str(local), chunk_size=2 * MB, workers=3)
+
+    assert local.read_bytes() == remote_file.read_bytes()
+    assert summary["bytes"] == remote_file.stat().st_size
+
+
+def test_stream_sftp_to_s3(sftp, remote_file, monkeypatch):
+    moto = pytest.importorskip("moto")
+    from omelette.eggs.s3 import S3
+    from omelette.eggs.sftp_s3_interface import SftpS3Interface
+
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+
+    with moto.mock_aws():
+        s3 = S3()
+        s3.client.create_bucket(Bucket="bucket")
+        interface = SftpS3Interface(sftp=sftp, s3=s3)
+
+        summary = interface.stream_sftp_to_s3(remote_file.name, str(remote_file.parent), "bucket", "remote.bin",
+                                              part_size=5 * MB)
+
+        assert summary["parts"] == 2
+        assert s3.client.get_object(Bucket="bucket", Key="remote.bin")["Body"].read() == remote_file.read_bytes()
+
+
+@pytest.mark.parametrize("size", [0, 100 * 1024, 2 * MB + 12345])
+def test_parallel_round_trip(sftp, tmp_path, size):
+    source, remote, copy = tmp_path / "source.bin", tmp_path / "remote.bin", tmp_path / "copy.bin"
+    source.write_bytes(os.urandom(size))
+
+    put_summary = sftp.put_parallel(str(source), str(remote), chunk_size=MB, workers=2)
+    get_summary = sftp.get_parallel(str(remote), str(copy), chunk_size=MB, workers=2)
+
+    assert remote.read_bytes() == copy.read_bytes() == source.read_bytes()
+    assert put_summary["bytes"] == get_summary["bytes"] == size
+
+
+def test_parallel_transfers_overwrite_larger_files(sftp, tmp_path):
+    source, remote, copy = tmp_path / "source.bin", tmp_path / "remote.bin", tmp_path / "copy.bin"
+    source.write_bytes(os.urandom(MB + 1))
+    remote.write_bytes(b"x" * 3 * MB)
+    copy.write_bytes(b"y" * 3 * MB)
+
+    sftp.put_parallel(str(source), str(remote), chunk_size=MB, workers=2)
+    sftp.get_parallel(str(remote), str(copy), chunk_size=MB, workers=2)
+
+    assert remote.read_bytes() == copy.read_bytes() == source.read_bytes()
@@ -0,0 +1,176 @@
+import gc
+import threading
+
+import pytest
+
+pytest.importorskip("pysftp")
+
+from omelette.eggs import sftp as sftp_module  # noqa: E402
+from omelette.eggs.sftp import Sftp, SftpPool  # noqa: E402
+
+
+def is_locked(pool) -> bool:
+    """Whether the pool's lock is held. Probed from another thread, since the lock is reentrant."""
+    acquired = []
+
+    def probe():
+        acquired.append(pool._condition.acquire(blocking=False))
+        if acquired[0]:
+            pool._condition.release()
+
+    thread = threading.Thread(target=probe)
+    thread.start()
+    thread.join()
+    return not acquired[0]
+
+
+class StubTransport:
+    def __init__(self):
+        self.active = True
+
+    def is_active(self):
+        return self.active
+
+    def set_keepalive(self, interval):
+        pass
+
+
+class StubChannel:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class StubSftp(Sftp):
+    opened = []
+    # Called with the connection on each health check
+    on_health_check = None
+
+    def __init__(self, **kwargs):
+        self._transport = StubTransport()
+        self.closed = False
+        self.health_checks = 0
+        self.opened.append(self)
+
+    def close(self):
+        self.closed = True
+
+    def normalize(self, path):
+        self.health_checks += 1
+        if self.on_health_check:
+            self.on_health_check(self)
+        return "/"
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(StubSftp, "opened", [])
+    monkeypatch.setattr(sftp_module, "Sftp", StubSftp)
+    monkeypatch.setattr(sftp_module.paramiko.SFTPClient, "from_transport", lambda transport: StubChannel())
+    return SftpPool({"host": "example.com", "username": "user"}, max_idle_time=60, health_check_interval=10)
+
+
+def age(pool, seconds):
+    pool._last_used -= seconds
+
+
+def test_open_channels_keep_connection_in_use(pool):
+    conn = pool.connection()
+    channel = conn.open_channel()
+    age(pool, 120)
+
+    pool._evict_idle()
+    assert pool.connection() is conn
+    assert not conn.closed
+
+    channel.close()
+    assert channel.closed
+    age(pool, 120)
+
+    pool._evict_idle()
+    assert conn.closed
+
+
+def test_closing_a_channel_counts_as_use(pool):
+    channel = pool.open_channel()
+    age(pool, 120)
+    channel.close()
+    channel.close()
+
+    assert pool._leases == 0
+    assert pool._get_idle_time() < 1
+
+
+def test_garbage_collected_channel_releases_lease(pool):
+    pool.open_channel()
+    gc.collect()
+
+    assert pool._leases == 0
+
+
+def test_dead_transport_is_replaced_even_with_open_channels(pool):
+    conn = pool.connection()
+    conn.open_channel()
+    conn._transport.active = False
+
+    assert pool.connection() is not conn
+    assert pool._leases == 0
+
+
+def test_health_check_and_connect_run_outside_the_lock(pool, monkeypatch):
+    locked = []
+    monkeypatch.setattr(StubSftp, "on_health_check", staticmethod(lambda conn: locked.append(is_locked(pool))))
+    monkeypatch.setattr(sftp_module, "Sftp", lambda **kwargs: locked.append(is_locked(pool)) or StubSftp())
+
+    conn = pool.connection()
+    age(pool, 20)
+
+    assert pool.connection() is conn
+    assert conn.health_checks == 1
+    assert locked == [False, False]
+
+
+def test_failed_health_check_replaces_connection(pool, monkeypatch):
+    def fail(conn):
+        raise EOFError("connection lost")
+
+    conn = pool.connection()
+    age(pool, 20)
+    monkeypatch.setattr(StubSftp, "on_health_check", staticmethod(fail))
+
+    new_conn = pool.connection()
+
+    assert new_conn is not conn
+    assert conn.closed
+    assert pool.connection() is new_conn
+
+
+def test_threads_wait_for_health_check_instead_of_connecting(pool, monkeypatch):
+    conn = pool.connection()
+    age(pool, 20)
+    checking, resume = threading.Event(), threading.Event()
+
+    def slow_health_check(_conn):
+        checking.set()
+        resume.wait(5)
+
+    monkeypatch.setattr(StubSftp, "on_health_check", staticmethod(slow_health_check))
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(pool.connection())) for _ in range(3)]
+    threads[0].start()
+    checking.wait(5)
+
+    for thread in threads[1:]:
+        thread.start()
+    # Channels of the connection can still be opened while it's checked
+    conn.open_channel().close()
+    resume.set()
+
+    for thread in threads:
+        thread.join()
+
+    assert results == [conn] * 3
+    assert conn.health_checks == 1
+    assert StubSftp.opened == [conn]
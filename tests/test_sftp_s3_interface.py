@@ -0,0 +1,90 @@
+import io
+import stat
+from types import SimpleNamespace
+
+import pytest
+
+moto = pytest.importorskip("moto")
+pytest.importorskip("pysftp")
+
+from omelette.eggs.s3 import S3  # noqa: E402
+from omelette.eggs.sftp_s3_interface import SftpS3Interface, TransferException  # noqa: E402
+
+BUCKET = "bucket"
+
+
+class StubRemoteFile(io.BytesIO):
+    def __init__(self, files, path):
+        super().__init__()
+        self.files = files
+        self.path = path
+
+    def set_pipelined(self, pipelined):
+        pass
+
+    def close(self):
+        self.files[self.path] = self.getvalue()
+        super().close()
+
+
+class StubSftp:
+    """In-memory SFTP connection, also standing in for its channels. Writes to `failing` paths fail."""
+
+    def __init__(self, failing=()):
+        self.files = {}
+        self.failing = failing
+
+    def open_channel(self):
+        return self
+
+    def close(self):
+        pass
+
+    def listdir_attr(self, directory):
+        return [SimpleNamespace(filename=path.rsplit("/", 1)[-1], st_size=len(data), st_mtime=0,
+                                st_mode=stat.S_IFREG) for path, data in self.files.items()]
+
+    def stat(self, path):
+        return SimpleNamespace(st_size=len(self.files[path]))
+
+    def open(self, path, mode):
+        if path in self.failing:
+            raise PermissionError(f"Permission denied: {path}")
+        return StubRemoteFile(self.files, path)
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+
+    with moto.mock_aws():
+        s3 = S3()
+        s3.client.create_bucket(Bucket=BUCKET)
+
+        for key in ["exports/a.csv", "exports/b.csv", "exports/nested/c.csv", "exports-old/d.csv"]:
+            s3.client.put_object(Bucket=BUCKET, Key=key, Body=key.encode())
+        yield s3
+
+
+@pytest.mark.parametrize("prefix", ["exports", "exports/"])
+def test_sync_s3_prefix_to_sftp(s3, prefix):
+    sftp = StubSftp()
+    interface = SftpS3Interface(sftp=sftp, s3=s3)
+
+    manifest = interface.sync_s3_prefix_to_sftp(BUCKET, prefix, "/upload")
+
+    assert sorted(f["name"] for f in manifest["transferred"]) == ["exports/a.csv", "exports/b.csv"]
+    assert sftp.files == {"/upload/a.csv": b"exports/a.csv", "/upload/b.csv": b"exports/b.csv"}
+
+
+def test_sync_failure_carries_manifest(s3):
+    interface = SftpS3Interface(sftp=StubSftp(failing={"/upload/b.csv"}), s3=s3)
+
+    with pytest.raises(TransferException) as e:
+        interface.sync_s3_prefix_to_sftp(BUCKET, "exports", "/upload")
+
+    manifest = e.value.manifest
+    assert [f["name"] for f in manifest["transferred"]] == ["exports/a.csv"]
+    assert manifest["failed"] == [{"name": "exports/b.csv", "error": "Permission denied: /upload/b.csv"}]
@@ -0,0 +1,83 @@
+import threading
+
+import pytest
+
+pytest.importorskip("snowflake.connector")
+
+from snowflake.connector.errors import ProgrammingError  # noqa: E402
+
+from omelette.eggs.snowflake import Snowflake  # noqa: E402
+
+
+class StubCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.sfqid = None
+        self.rows = []
+
+    def execute_async(self, query_string):
+        self.sfqid = f"q{len(self.conn.queries)}"
+        self.conn.queries[self.sfqid] = query_string
+
+    def get_results_from_sfqid(self, query_id):
+        self.rows = [(self.conn.queries[query_id],)]
+
+    def fetchall(self):
+        return self.rows
+
+
+class StubConnection:
+    def __init__(self, polls_until_done, failed=()):
+        """`polls_until_done` maps each query string to the number of status polls it keeps running for."""
+        self.polls_until_done = polls_until_done
+        self.failed = failed
+        self.queries = {}
+        self.polls = {}
+        self.poll_threads = set()
+
+    def cursor(self, cursor_class=None):
+        return StubCursor(self)
+
+    def get_query_status_throw_if_error(self, query_id):
+        query_string = self.queries[query_id]
+        self.poll_threads.add(threading.get_ident())
+        self.polls[query_id] = self.polls.get(query_id, 0) + 1
+
+        if query_string in self.failed:
+            raise ProgrammingError(msg=f"Query {query_id} failed")
+
+        return self.polls[query_id] <= self.polls_until_done[query_string]
+
+    def is_still_running(self, status):
+        return status
+
+
+def get_snowflake(polls_until_done, failed=()):
+    sf = Snowflake.__new__(Snowflake)
+    sf.conn = StubConnection(polls_until_done, failed)
+    return sf
+
+
+def test_gather_yields_in_completion_order():
+    sf = get_snowflake({"SELECT 1": 2, "SELECT 2": 0, "SELECT 3": 1})
+    handles = [sf.submit(q) for q in ["SELECT 1", "SELECT 2", "SELECT 3"]]
+
+    results = [(handle, cursor.fetchall()) for handle, cursor in sf.gather(handles, poll_interval=0)]
+
+    assert results == [(handles[1], [("SELECT 2",)]), (handles[2], [("SELECT 3",)]), (handles[0], [("SELECT 1",)])]
+    assert sf.conn.polls == {"q0": 3, "q1": 1, "q2": 2}
+    assert threading.get_ident() not in sf.conn.poll_threads
+
+
+def test_gather_raises_for_failed_query():
+    sf = get_snowflake({"SELECT 1": 0, "SELECT 2": 5}, failed={"SELECT 2"})
+    handles = [sf.submit(q) for q in ["SELECT 1", "SELECT 2"]]
+
+    with pytest.raises(ProgrammingError, match="Query q1 failed"):
+        list(sf.gather(handles, poll_interval=0))
+
+
+def test_gather_without_handles():
+    sf = get_snowflake({})
+
+    assert list(sf.gather([])) == []
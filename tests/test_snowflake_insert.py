@@ -0,0 +1,41 @@
+import pytest
+
+pytest.importorskip("snowflake.connector")
+pytest.importorskip("pandas")
+
+from snowflake.connector import pandas_tools  # noqa: E402
+
+from omelette.eggs.snowflake import Snowflake, _split_table_name  # noqa: E402
+
+
+@pytest.fixture
+def write_pandas(monkeypatch):
+    calls = []
+
+    def stub_write_pandas(conn, df, table_name, **kwargs):
+        calls.append(dict(kwargs, table_name=table_name, columns=list(df.columns)))
+        return True, 1, len(df), []
+
+    monkeypatch.setattr(pandas_tools, "write_pandas", stub_write_pandas)
+    return calls
+
+
+@pytest.mark.parametrize("table_name, expected", [
+    ("t", (None, None, "t")),
+    ("s.t", (None, "s", "t")),
+    ("d.s.t", ("d", "s", "t")),
+])
+def test_split_table_name(table_name, expected):
+    assert _split_table_name(table_name) == expected
+
+
+def test_insert_rows_copy_path_uses_unquoted_qualified_name(write_pandas):
+    sf = Snowflake.__new__(Snowflake)
+    sf.conn = None
+
+    summary = sf.insert_rows("db.sch.events", [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}], ["id", "name"],
+                             copy_threshold=2)
+
+    assert summary["rows"] == 2
+    assert write_pandas == [dict(table_name="events", database="db", schema="sch", chunk_size=None, parallel=4,
+                                 quote_identifiers=False, columns=["id", "name"])]
@@ -0,0 +1,108 @@
+import gc
+import threading
+
+import pytest
+
+pytest.importorskip("snowflake.connector")
+
+from omelette.eggs import snowflake as snowflake_module  # noqa: E402
+from omelette.eggs.snowflake import Snowflake, SnowflakeConnectionPool  # noqa: E402
+
+
+def is_locked(pool) -> bool:
+    """Whether the pool's lock is held. Probed from another thread, since the lock is reentrant."""
+    acquired = []
+
+    def probe():
+        acquired.append(pool._condition.acquire(blocking=False))
+        if acquired[0]:
+            pool._condition.release()
+
+    thread = threading.Thread(target=probe)
+    thread.start()
+    thread.join()
+    return not acquired[0]
+
+
+class StubConnection:
+    def __init__(self, pool=None):
+        self.pool = pool
+        self.closed = False
+        self.health_checks = 0
+
+    def is_closed(self):
+        return self.closed
+
+    def close(self):
+        self.closed = True
+
+    def cursor(self):
+        return self
+
+    def execute(self, query_string):
+        self.health_checks += 1
+        # The pool lock must not be held during the round trip
+        assert not is_locked(self.pool)
+        return self
+
+    def fetchone(self):
+        return (1,)
+
+
+@pytest.fixture
+def connect(monkeypatch):
+    connections = []
+
+    def stub_connect(**kwargs):
+        connections.append(StubConnection())
+        return connections[-1]
+
+    monkeypatch.setattr(snowflake_module.snowflake.connector, "connect", stub_connect)
+    SnowflakeConnectionPool.close_all()
+    yield connections
+    SnowflakeConnectionPool.close_all()
+
+
+def get_snowflake(**kwargs):
+    return Snowflake(user="u", password="p", account="a", region="r", warehouse="w", database="d", role="r",
+                     pooled=True, **kwargs)
+
+
+def test_unclosed_pooled_snowflake_releases_connection(connect):
+    sf = get_snowflake(pool_size=1)
+    pool = sf.pool
+    del sf
+    gc.collect()
+
+    assert len(pool._idle) == 1
+    assert get_snowflake(pool_size=1).conn is connect[0]
+
+
+def test_closed_pooled_snowflake_releases_once(connect):
+    sf = get_snowflake()
+    pool = sf.pool
+    sf.close()
+    del sf
+    gc.collect()
+
+    assert len(pool._idle) == 1
+
+
+def test_health_check_runs_outside_lock(connect):
+    pool = SnowflakeConnectionPool({"account": "health"}, health_check_interval=0)
+    conn = pool.acquire()
+    conn.pool = pool
+    pool.release(conn)
+
+    assert pool.acquire() is conn
+    assert conn.health_checks == 1
+
+
+def test_unhealthy_connection_frees_its_slot(connect):
+    pool = SnowflakeConnectionPool({"account": "unhealthy"}, max_size=1, timeout=0)
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.closed = True
+
+    assert pool.acquire() is connect[1]
+    assert pool._open_count == 1
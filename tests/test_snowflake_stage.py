@@ -0,0 +1,121 @@
+import pytest
+
+pytest.importorskip("snowflake.connector")
+
+from omelette.eggs.snowflake import Snowflake  # noqa: E402
+
+
+class StubCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rows = []
+
+    def execute(self, query_string):
+        self.conn.queries.append(query_string)
+        self.rows = self.conn.results(query_string)
+        return self
+
+    def fetchall(self):
+        return self.rows
+
+
+class StubConnection:
+    def __init__(self, results):
+        self.results = results
+        self.queries = []
+
+    def cursor(self, cursor_class=None):
+        return StubCursor(self)
+
+
+def get_snowflake(results):
+    sf = Snowflake.__new__(Snowflake)
+    sf.conn = StubConnection(results)
+    return sf
+
+
+@pytest.mark.parametrize("file_format, compression, format_options", [
+    ("parquet", "snappy", "TYPE = PARQUET COMPRESSION = SNAPPY"),
+    ("my_db.my_schema.my_format", "gzip", "FORMAT_NAME = 'my_db.my_schema.my_format'"),
+])
+def test_unload_to_stage(file_format, compression, format_options):
+    files = [{"FILE_NAME": "exports/data_0_0_0.parquet", "FILE_SIZE": 100, "ROW_COUNT": 5}]
+    sf = get_snowflake(lambda query_string: files)
+
+    result = sf.unload_to_stage(" SELECT * FROM t;\n", "my_stage", prefix="/exports/", file_format=file_format,
+                                max_file_size=1000, compression=compression)
+
+    assert result == files
+    assert sf.conn.queries == [f"COPY INTO @my_stage/exports/ FROM (SELECT * FROM t) "
+                               f"FILE_FORMAT = ({format_options}) HEADER = TRUE OVERWRITE = FALSE "
+                               f"DETAILED_OUTPUT = TRUE MAX_FILE_SIZE = 1000"]
+
+
+def test_unload_to_stage_without_prefix():
+    sf = get_snowflake(lambda query_string: [])
+
+    sf.unload_to_stage("SELECT 1", "my_stage", header=False)
+
+    assert sf.conn.queries == ["COPY INTO @my_stage FROM (SELECT 1) FILE_FORMAT = (TYPE = CSV) HEADER = FALSE "
+                               "OVERWRITE = FALSE DETAILED_OUTPUT = TRUE"]
+
+
+def put_result(query_string, status="UPLOADED"):
+    source = query_string.split("'")[1].rsplit("/", 1)[-1]
+    return [{"source": source, "target": f"{source}.gz", "status": status}]
+
+
+def test_stage_files_put_options(tmp_path):
+    sf = get_snowflake(put_result)
+    paths = [str(tmp_path / "a.csv"), str(tmp_path / "b.csv")]
+
+    results = sf.stage_files(paths, "my_stage", parallel=8, auto_compress=False, overwrite=True, max_workers=2)
+
+    assert [r["source"] for r in results] == ["a.csv", "b.csv"]
+    assert sorted(sf.conn.queries) == [f"PUT 'file://{path}' @my_stage PARALLEL = 8 AUTO_COMPRESS = FALSE "
+                                       f"OVERWRITE = TRUE" for path in paths]
+
+
+def test_stage_files_glob_is_one_put(tmp_path):
+    sf = get_snowflake(lambda query_string: [])
+
+    sf.stage_files(str(tmp_path / "*.csv"), "my_stage")
+
+    assert sf.conn.queries == [f"PUT 'file://{tmp_path}/*.csv' @my_stage PARALLEL = 4 AUTO_COMPRESS = TRUE "
+                               f"OVERWRITE = FALSE"]
+
+
+def test_copy_staged_file_batches_files():
+    sf = get_snowflake(lambda query_string: [{"file": "f", "rows_loaded": 1}] * query_string.count("'f"))
+    files = [f"f{i}.csv" for i in range(2500)]
+
+    results = sf.copy_staged_file("my_stage", "t", files=files, file_format="my_format", purge=True)
+
+    assert len(results) == 2500
+    file_lists = [q.split("FILES = (")[1].split(")")[0].split(", ") for q in sf.conn.queries]
+    assert [len(file_list) for file_list in file_lists] == [1000, 1000, 500]
+    assert [name.strip("'") for file_list in file_lists for name in file_list] == files
+    assert all(q.endswith(") FILE_FORMAT = (FORMAT_NAME = 'my_format') PURGE = TRUE") for q in sf.conn.queries)
+
+
+def test_load_files_copies_only_staged_files():
+    statuses = {"a.csv": "UPLOADED", "b.csv": "SKIPPED", "c.csv": "ERROR"}
+
+    def results(query_string):
+        if query_string.startswith("PUT"):
+            source = query_string.split("'")[1].rsplit("/", 1)[-1]
+            return put_result(query_string, statuses[source])
+        return []
+
+    sf = get_snowflake(results)
+
+    sf.load_files(list(statuses), "my_stage", "t", max_workers=1)
+
+    assert sf.conn.queries[3:] == ["COPY INTO t FROM @my_stage FILES = ('a.csv.gz', 'b.csv.gz')"]
+
+
+def test_load_files_without_staged_files_skips_copy():
+    sf = get_snowflake(lambda query_string: put_result(query_string, "ERROR"))
+
+    assert sf.load_files(["a.csv"], "my_stage", "t") == []
+    assert len(sf.conn.queries) == 1
@@ -0,0 +1,66 @@
+import pytest
+
+pytest.importorskip("snowflake.connector")
+
+from omelette.eggs.snowflake import Snowflake  # noqa: E402
+
+
+class StubCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.arraysize = 1
+        self.rows = []
+
+    def execute(self, query_string):
+        self.conn.queries.append(query_string)
+
+        if query_string.startswith("SHOW PARAMETERS"):
+            self.rows = [("CLIENT_PREFETCH_THREADS",) + self.conn.prefetch_threads]
+        elif query_string.startswith("SELECT"):
+            self.rows = [(i,) for i in range(5)]
+        return self
+
+    def fetchone(self):
+        return self.rows[0]
+
+    def fetchmany(self):
+        rows, self.rows = self.rows[:self.arraysize], self.rows[self.arraysize:]
+        return rows
+
+    def close(self):
+        pass
+
+
+class StubConnection:
+    def __init__(self, prefetch_threads):
+        self.prefetch_threads = prefetch_threads
+        self.queries = []
+
+    def cursor(self, cursor_class=None):
+        return StubCursor(self)
+
+
+def get_snowflake(prefetch_threads):
+    sf = Snowflake.__new__(Snowflake)
+    sf.conn = StubConnection(prefetch_threads)
+    return sf
+
+
+def test_stream_yields_batches():
+    sf = get_snowflake(("4", "4", "", "", "NUMBER"))
+
+    assert list(sf.stream("SELECT i", batch_size=2, fetch_size=3)) == [[(0,), (1,)], [(2,), (3,)], [(4,)]]
+    assert sf.conn.queries == ["SELECT i"]
+
+
+@pytest.mark.parametrize("prefetch_threads, restore", [
+    (("4", "4", "", "", "NUMBER"), "ALTER SESSION UNSET CLIENT_PREFETCH_THREADS"),
+    (("2", "4", "SESSION", "", "NUMBER"), "ALTER SESSION SET CLIENT_PREFETCH_THREADS = 2"),
+])
+def test_stream_restores_prefetch_threads(prefetch_threads, restore):
+    sf = get_snowflake(prefetch_threads)
+    stream = sf.stream("SELECT i", prefetch_threads=8)
+    next(stream)
+    stream.close()
+
+    assert sf.conn.queries[1:] == ["ALTER SESSION SET CLIENT_PREFETCH_THREADS = 8", "SELECT i", restore]